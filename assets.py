@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''Loads assets on a worker thread.
+
+Every job is split in two: ``decode`` runs on the worker and must not
+touch OpenGL, ``finish`` gets its result on the main thread, e.g. to
+upload a texture. Main thread calls ``poll()`` once a frame.
+'''
+
+import threading
+import timeit
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+
+clock = timeit.default_timer
+
+
+class AssetLoader(object):
+
+    def __init__(self):
+        self.__jobs = []
+        self.__done = queue.Queue()
+        self.__thread = None
+        self.__finished = 0
+        self.errors = []
+
+    def __len__(self):
+        return len(self.__jobs)
+
+    def add(self, name, decode, finish=None):
+        if self.__thread is not None:
+            raise RuntimeError('loader is already started')
+        self.__jobs.append((name, decode, finish))
+
+    def start(self):
+        self.__thread = threading.Thread(target=self.__work,
+                                         name='asset-loader')
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def __work(self):
+        for name, decode, finish in self.__jobs:
+            try:
+                self.__done.put((name, finish, decode(), None))
+            except Exception as error:
+                self.__done.put((name, finish, None, error))
+
+    @property
+    def progress(self):
+        if not self.__jobs:
+            return 1.0
+        return float(self.__finished) / len(self.__jobs)
+
+    @property
+    def is_done(self):
+        return self.__finished == len(self.__jobs)
+
+    def poll(self, budget=None):
+        '''Finishes decoded jobs, for at most budget seconds if given.
+        Returns True once every job is finished.'''
+        started = clock()
+        while not self.is_done:
+            if budget is not None and clock() - started >= budget:
+                break
+            try:
+                name, finish, result, error = self.__done.get_nowait()
+            except queue.Empty:
+                break
+
+            self.__finished += 1
+            if error is None and finish is not None:
+                try:
+                    finish(result)
+                except Exception as finish_error:
+                    error = finish_error
+            if error is not None:
+                self.errors.append((name, error))
+        return self.is_done
+
+    def wait(self):
+        '''Loads everything right away, e.g. without a window to show.'''
+        if self.__thread is None:
+            self.start()
+        while not self.poll():
+            self.__thread.join(0.001)
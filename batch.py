@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''Plays many seeded games over a grid of balance rules on all cores.
+
+    python batch.py --games 50 --grid enemy_probability=1,3,5 \\
+        --grid distance=3,3.5,4 --output results.csv
+
+Every game is played by the bot until game over or the time limit. Table
+has a row per rules: how far the hero got in screen widths, score and
+logic cost per tick.
+'''
+
+from __future__ import print_function
+
+import argparse
+import csv
+import itertools
+import multiprocessing
+import timeit
+
+from config import DEFAULT_RULES, FPS
+from headless import Bot, run
+from profiler import Profiler
+
+
+clock = timeit.default_timer
+
+WIDTH, HEIGHT = 1280, 720
+SECONDS = 300
+
+
+def parse_grid(value):
+    '''name=v1,v2 into (name, [v1, v2]), values typed as the default.'''
+    name, values = value.split('=', 1)
+    if name not in DEFAULT_RULES._fields:
+        raise argparse.ArgumentTypeError(
+            'unknown rule %s, any of: %s' % (
+                name, ', '.join(DEFAULT_RULES._fields)))
+
+    default = getattr(DEFAULT_RULES, name)
+    if isinstance(default, tuple):
+        # Ranges are given as low:high.
+        parse = lambda item: tuple(int(part) for part in item.split(':'))
+    else:
+        parse = type(default)
+    return name, [parse(item) for item in values.split(',')]
+
+
+def get_rules(grid):
+    '''Every combination of the grid values.'''
+    names = [name for name, _ in grid]
+    for values in itertools.product(*[values for _, values in grid]):
+        yield DEFAULT_RULES._replace(**dict(zip(names, values)))
+
+
+def play(job):
+    rules, seed, seconds = job
+    ticks = int(seconds / FPS)
+    profiler = Profiler(size=ticks)
+    bot = Bot()
+
+    def player(game, tick):
+        with profiler.section('bot'):
+            bot(game, tick)
+
+    game = run(ticks, WIDTH, HEIGHT, seed, FPS, player, profiler=profiler,
+               threaded=False, rules=rules)
+    # Frames take the bot's turn too, only the step is the logic cost.
+    report = profiler.get_report()
+    tick = report['work']['mean'] - report['sections']['bot']['mean']
+    return rules, dict(screens=game.scrolled / WIDTH, points=game.points,
+                       islands=game.number_of_islands, over=game.is_over,
+                       tick=tick / 1000)
+
+
+def aggregate(results):
+    '''Means over games of the same rules.'''
+    games = dict()
+    for rules, result in results:
+        games.setdefault(rules, []).append(result)
+
+    table = []
+    for rules, results in games.items():
+        count = float(len(results))
+        screens = sorted(result['screens'] for result in results)
+        row = rules._asdict()
+        row.update(
+            games=len(results),
+            screens=sum(screens) / count,
+            median_screens=screens[len(screens) // 2],
+            points=sum(result['points'] for result in results) / count,
+            islands=sum(result['islands'] for result in results) / count,
+            survived=sum(1 for result in results if not result['over']),
+            tick_us=1e6 * sum(result['tick'] for result in results) / count)
+        table.append(row)
+    table.sort(key=lambda row: row['screens'], reverse=True)
+    return table
+
+
+def format_value(value):
+    if isinstance(value, float):
+        return '%.2f' % value
+    if isinstance(value, tuple):
+        return ':'.join(map(str, value))
+    return str(value)
+
+
+COLUMNS = ('games', 'screens', 'median_screens', 'points', 'islands',
+           'survived', 'tick_us')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--grid', type=parse_grid, action='append',
+                        default=[], metavar='RULE=V1,V2',
+                        help='rule values to try, repeat for more rules')
+    parser.add_argument('--games', type=int, default=20,
+                        help='seeds played per rules')
+    parser.add_argument('--seed', type=int, default=0, help='first seed')
+    parser.add_argument('--seconds', type=float, default=SECONDS,
+                        help='game time limit')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='processes, all cores by default')
+    parser.add_argument('--output', help='write the table as CSV')
+    args = parser.parse_args()
+
+    names = [name for name, _ in args.grid]
+    jobs = [(rules, seed, args.seconds)
+            for rules in get_rules(args.grid)
+            for seed in range(args.seed, args.seed + args.games)]
+
+    started = clock()
+    pool = multiprocessing.Pool(args.workers)
+    try:
+        results = list(pool.imap_unordered(play, jobs, chunksize=4))
+    finally:
+        pool.close()
+        pool.join()
+    table = aggregate(results)
+
+    print('%d games in %.1f s' % (len(jobs), clock() - started))
+    header = names + list(COLUMNS)
+    print('  '.join('%15s' % name for name in header))
+    for row in table:
+        print('  '.join('%15s' % format_value(row[name]) for name in header))
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            writer = csv.DictWriter(output, list(DEFAULT_RULES._fields) +
+                                    list(COLUMNS), extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(
+                dict((name, format_value(value) if isinstance(value, tuple)
+                      else value) for name, value in row.items())
+                for row in table)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''Frame time benchmarks of the game logic.
+
+Every case is measured at several entity counts and reported as p50,
+p95 and p99 of single samples. Results can be written as JSON and
+compared with the results of a previous run:
+
+    python bench.py --output new.json --compare baseline.json
+'''
+
+from __future__ import print_function
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import timeit
+
+import bezier
+
+from config import (BEZIER_PRECISION, COIN_COLLECT_TIME, COIN_SIZE,
+                    ENTITY_BUDGET, FPS)
+from effects import Tweens
+from simulation import Coin, Island, Simulation
+
+
+WIDTH, HEIGHT = 1280, 720
+COUNTS = (10, 100, 1000)
+# NumPy for movement and collisions, see --numpy.
+VECTORIZED = False
+REPEAT = 200
+PERCENTILES = (50, 95, 99)
+
+clock = timeit.default_timer
+
+
+def percentile(samples, value):
+    '''Nearest rank percentile of sorted samples.'''
+    index = int(round(value / 100.0 * (len(samples) - 1)))
+    return samples[index]
+
+
+def measure(run, repeat, setup=None):
+    '''Times ``run()`` repeat times, ``setup()`` is called before each
+    sample and is not measured. GC is left enabled, its pauses are part of
+    the frame time as well.'''
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = clock()
+        run()
+        samples.append(clock() - started)
+    samples.sort()
+    return samples
+
+
+def make_game(count=0, seed=0):
+    '''Game with room for count more bodies than the game budget.'''
+    game = Simulation(WIDTH, HEIGHT, seed, vectorized=VECTORIZED,
+                      budget=ENTITY_BUDGET + count)
+    game.touch_down()
+    # Nothing spawned by the game itself, cases decide what is on screen.
+    game.scheduler.clear()
+    for entity in list(game.store):
+        if entity.index is not None and entity is not game.hero:
+            game.recycle(entity)
+    return game
+
+
+def spawn_far(game, cls, count):
+    '''Spawns objects far enough to the right to stay alive while measured.'''
+    entities = []
+    for index in range(count):
+        x = 2 * WIDTH + index * 10
+        entity = game.spawn(cls, pos=(x, game.random.randint(0, HEIGHT)))
+        if entity is None:
+            raise RuntimeError('%s refused over the budget of %d' % (
+                cls.__name__, game.lifecycle.budget))
+        entities.append(entity)
+    return entities
+
+
+def case_update(count, repeat):
+    '''Movement of every entity.'''
+    game = make_game(count)
+    spawn_far(game, Coin, count)
+    return measure(lambda: game.move(FPS), repeat)
+
+
+def case_step(count, repeat):
+    '''Whole simulation step: movement, spawning and collisions.'''
+    game = make_game(count)
+    spawn_far(game, Coin, count // 2)
+    spawn_far(game, Island, count - count // 2)
+    return measure(lambda: game.step(FPS), repeat)
+
+
+def case_bezier(count, repeat):
+    '''Sampling of count coin arcs, one by one.'''
+    game = make_game(count)
+    arcs = [[[0, 0]] + [[game.random.randint(0, 2 * WIDTH),
+                         game.random.randint(0, HEIGHT)] for _ in range(3)]
+            for _ in range(count)]
+
+    def run():
+        for points in arcs:
+            bezier.bezier(points, BEZIER_PRECISION)
+    return measure(run, repeat)
+
+
+def case_bezier_batch(count, repeat):
+    '''Sampling of count coin arcs at once.'''
+    game = make_game(count)
+    arcs = [[[0, 0]] + [[game.random.randint(0, 2 * WIDTH),
+                         game.random.randint(0, HEIGHT)] for _ in range(3)]
+            for _ in range(count)]
+    return measure(lambda: bezier.bezier_batch(arcs, BEZIER_PRECISION),
+                   repeat)
+
+
+def case_coin_flights(count, repeat):
+    '''One frame of count collected coins flying to the hero.'''
+    tweens = Tweens()
+
+    def setup():
+        tweens.clear()
+        for index in range(count):
+            tweens.add((index, index, COIN_SIZE[0]), (0, 0, 0),
+                       COIN_COLLECT_TIME, 'in_quad', lambda key: None)
+    return measure(lambda: tweens.update(FPS), repeat, setup)
+
+
+def case_coins_coords(count, repeat):
+    '''Generation of count arcs the way the game does it.'''
+    game = make_game(count)
+
+    def run():
+        for _ in range(count):
+            game.level.get_coins_coords()
+    return measure(run, repeat)
+
+
+def case_island_collision(count, repeat):
+    '''Island narrowphase of count islands right under the hero.'''
+    game = make_game(count)
+    hero = game.hero
+    y = hero.y
+    islands = spawn_far(game, Island, count)
+    for island in islands:
+        island.x, island.top = hero.x, y + 1
+
+    def setup():
+        hero.y = y
+
+    def run():
+        for island in islands:
+            island._collides_with(hero)
+    return measure(run, repeat, setup)
+
+
+def case_coin_collection(count, repeat):
+    '''Broadphase and collection of count coins overlapping the hero.'''
+    game = make_game(count)
+    hero = game.hero
+
+    def setup():
+        for coin in spawn_far(game, Coin, count):
+            coin.x, coin.y = hero.x, hero.y
+
+    def run():
+        game.collide(hero.get_intersection_coords())
+    return measure(run, repeat, setup)
+
+
+def case_add_island(count, repeat):
+    '''Spawning of an island among count live entities.'''
+    game = make_game(count)
+    spawn_far(game, Coin, count)
+    spawned = []
+    game.bind(on_spawn=spawned.append)
+
+    def setup():
+        for entity in spawned:
+            if isinstance(entity, Island):
+                game.recycle(entity)
+        del spawned[:]
+
+    return measure(game.add_island, repeat, setup)
+
+
+CASES = (
+    ('update', case_update),
+    ('step', case_step),
+    ('bezier', case_bezier),
+    ('bezier_batch', case_bezier_batch),
+    ('coin_flights', case_coin_flights),
+    ('coins_coords', case_coins_coords),
+    ('island_collision', case_island_collision),
+    ('coin_collection', case_coin_collection),
+    ('add_island', case_add_island),
+)
+
+
+def run(cases=None, counts=COUNTS, repeat=REPEAT):
+    results = []
+    for name, case in CASES:
+        if cases and name not in cases:
+            continue
+        for count in counts:
+            gc.collect()
+            samples = case(count, repeat)
+            result = dict(case=name, count=count, samples=len(samples),
+                          mean=sum(samples) / len(samples))
+            for value in PERCENTILES:
+                result['p%d' % value] = percentile(samples, value)
+            results.append(result)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    '''Cases whose p95 grew more than tolerance times against baseline.'''
+    old = dict(((result['case'], result['count']), result)
+               for result in baseline['results'])
+
+    regressions = []
+    for result in results:
+        previous = old.get((result['case'], result['count']))
+        if previous and result['p95'] > previous['p95'] * (1 + tolerance):
+            regressions.append((result, previous))
+    return regressions
+
+
+def format_time(seconds):
+    return '%10.1f' % (seconds * 1e6)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('cases', nargs='*', metavar='case',
+                        help='any of: ' + ', '.join(name for name, _ in CASES))
+    parser.add_argument('--counts', default=','.join(map(str, COUNTS)),
+                        help='comma separated entity counts')
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--numpy', action='store_true',
+                        help='move and collide with NumPy')
+    parser.add_argument('--output', help='write results to JSON file')
+    parser.add_argument('--compare', help='baseline JSON file')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed p95 growth against baseline')
+    args = parser.parse_args()
+
+    global VECTORIZED
+    if args.numpy:
+        VECTORIZED = True
+
+    counts = [int(count) for count in args.counts.split(',')]
+    results = run(args.cases, counts, args.repeat)
+
+    print('%-18s %6s %10s %10s %10s   (microseconds)' % (
+        'case', 'count', 'p50', 'p95', 'p99'))
+    for result in results:
+        print('%-18s %6d %s %s %s' % (
+            result['case'], result['count'], format_time(result['p50']),
+            format_time(result['p95']), format_time(result['p99'])))
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(dict(python=platform.python_version(),
+                           machine=platform.machine(),
+                           numpy=bezier.numpy is not None,
+                           vectorized=VECTORIZED,
+                           repeat=args.repeat,
+                           results=results), output, indent=2)
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            regressions = compare(results, json.load(baseline),
+                                  args.tolerance)
+        for result, previous in regressions:
+            print('REGRESSION %s x%d: p95 %s -> %s us' % (
+                result['case'], result['count'],
+                format_time(previous['p95']).strip(),
+                format_time(result['p95']).strip()))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
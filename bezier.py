@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''Cubic bezier curves sampled with cached Bernstein basis.
+
+NumPy is used when it is installed, otherwise the same math is done in
+pure Python. Both return lists of integer ``(x, y)`` tuples, the very
+same ones: replays depend on coin positions, so both sum the terms in the
+same order rather than through a matrix product.
+'''
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+_basis_cache = {}
+
+
+def get_samples_count(precision):
+    '''Number of samples at t = precision, 2 * precision, ..., 1.'''
+    # Small epsilon, so 1 / 0.2 = 4.999... still gives 5 samples.
+    return int(1.0 / precision + 1e-9)
+
+
+def get_basis(precision):
+    '''Rows of cubic Bernstein polynomials, one row per sample.
+
+    Computed once per precision. Samples are ``i * precision``, so their
+    number does not depend on float error accumulation.
+    '''
+    try:
+        return _basis_cache[precision]
+    except KeyError:
+        pass
+
+    rows = []
+    for index in range(1, get_samples_count(precision) + 1):
+        t = min(index * precision, 1.0)
+        s = 1 - t
+        rows.append((s * s * s, 3 * t * s * s, 3 * t * t * s, t * t * t))
+
+    basis = numpy.array(rows) if numpy is not None else tuple(rows)
+    _basis_cache[precision] = basis
+    return basis
+
+
+def _python_curve(basis, points):
+    (x0, y0), (x1, y1), (x2, y2), (x3, y3) = points
+    return [(int(b0 * x0 + b1 * x1 + b2 * x2 + b3 * x3),
+             int(b0 * y0 + b1 * y1 + b2 * y2 + b3 * y3))
+            for b0, b1, b2, b3 in basis]
+
+
+def _numpy_sum(basis, controls):
+    '''b0 * p0 + b1 * p1 + b2 * p2 + b3 * p3 over the next to last axes,
+    added left to right like _python_curve does, truncated to int.'''
+    terms = basis * controls
+    total = terms[..., 0, :] + terms[..., 1, :]
+    total = total + terms[..., 2, :]
+    total = total + terms[..., 3, :]
+    return total.astype(int)
+
+
+def bezier(points, precision):
+    '''Samples one curve given by 4 control points.'''
+    assert len(points) == 4, len(points)
+    basis = get_basis(precision)
+
+    if numpy is None:
+        return _python_curve(basis, points)
+
+    # (samples, 1) x (4, 2) -> (samples, 2)
+    controls = numpy.asarray(points, dtype=float)
+    coords = _numpy_sum(basis[:, :, None], controls[None, :, :])
+    return [tuple(coord) for coord in coords.tolist()]
+
+
+def bezier_batch(points_sets, precision):
+    '''Samples many curves at once, e.g. to pregenerate a bank of arcs.
+
+    Returns list of curves in the order of control point sets.
+    '''
+    basis = get_basis(precision)
+
+    if numpy is None:
+        return [_python_curve(basis, points) for points in points_sets]
+
+    controls = numpy.asarray(points_sets, dtype=float)
+    assert controls.ndim == 3 and controls.shape[1:] == (4, 2), controls.shape
+
+    # (1, samples, 4, 1) x (curves, 1, 4, 2) -> (curves, samples, 2)
+    coords = _numpy_sum(basis[None, :, :, None], controls[:, None, :, :])
+    return [[tuple(coord) for coord in curve] for curve in coords.tolist()]
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''Packs game sprites and hero animation frames into a Kivy atlas.
+
+    python build_atlas.py
+
+Needs Kivy and Pillow. Run it again after changing anything in texture/,
+the game loads the separate files when there is no atlas.
+'''
+
+from __future__ import print_function
+
+import argparse
+import os
+import shutil
+import tempfile
+import zipfile
+
+from kivy.atlas import Atlas
+from PIL import Image
+
+from config import (ATLAS_ANIMATIONS, ATLAS_MAX_SIZE, ATLAS_PAGE_SIZE,
+                    ATLAS_PATH, ATLAS_SPRITES, TEXTURE_DIR)
+
+
+def shrink(source, destination, max_size):
+    '''Saves source as PNG no bigger than max_size on any side.'''
+    image = Image.open(source)
+    image.load()
+    if max(image.size) > max_size:
+        image.thumbnail((max_size, max_size), Image.LANCZOS)
+    image.save(destination)
+    return destination
+
+
+def extract_frames(name, archive, directory, max_size):
+    '''Animation frames in archive order as name_00, name_01...'''
+    frames = []
+    with zipfile.ZipFile(archive) as source:
+        members = sorted(member for member in source.namelist()
+                         if not member.endswith('/'))
+        for index, member in enumerate(members):
+            path = source.extract(member, directory)
+            frames.append(shrink(path, os.path.join(
+                directory, '%s_%02d.png' % (name, index)), max_size))
+    return frames
+
+
+def build(atlas_path=ATLAS_PATH, max_size=ATLAS_MAX_SIZE,
+          page_size=ATLAS_PAGE_SIZE):
+    directory = tempfile.mkdtemp()
+    try:
+        filenames = [
+            shrink(os.path.join(TEXTURE_DIR, name),
+                   os.path.join(directory, os.path.splitext(name)[0] +
+                                '.png'), max_size)
+            for name in ATLAS_SPRITES]
+        for name, archive in ATLAS_ANIMATIONS:
+            filenames.extend(extract_frames(
+                name, os.path.join(TEXTURE_DIR, archive),
+                os.path.join(directory, name), max_size))
+
+        outname = os.path.splitext(atlas_path)[0]
+        return Atlas.create(outname, filenames, page_size)
+    finally:
+        shutil.rmtree(directory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--output', default=ATLAS_PATH)
+    parser.add_argument('--max-size', type=int, default=ATLAS_MAX_SIZE,
+                        help='longest side of a packed image')
+    parser.add_argument('--page-size', type=int, default=ATLAS_PAGE_SIZE)
+    args = parser.parse_args()
+
+    result = build(args.output, args.max_size, args.page_size)
+    if not result:
+        raise SystemExit('images do not fit into the atlas pages')
+    filename, meta = result
+    print('%s: %d regions on %d pages' % (
+        filename, sum(len(regions) for regions in meta.values()),
+        len(meta)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''Exact collision tests used by the game objects.
+
+Rectangles are any objects with ``x``, ``y``, ``right`` and ``top``
+attributes, e.g. widgets or ``Hero.get_intersection_coords()``. Lines
+are ``(x_a, y_a, x_b, y_b)`` tuples. Touching borders count as collision.
+'''
+
+
+def clip_segment(x_min, y_min, x_max, y_max, line):
+    '''Liang-Barsky clipping of the line by the box.
+
+    Returns ``(t_in, t_out)`` part of the line inside the box or None.
+    '''
+    x_a, y_a, x_b, y_b = line
+    d_x, d_y = x_b - x_a, y_b - y_a
+
+    t_in, t_out = 0.0, 1.0
+    for p, q in ((-d_x, x_a - x_min), (d_x, x_max - x_a),
+                 (-d_y, y_a - y_min), (d_y, y_max - y_a)):
+        if p == 0:
+            if q < 0:
+                return None
+            continue
+
+        t = float(q) / p
+        if p < 0:
+            if t > t_out:
+                return None
+            if t > t_in:
+                t_in = t
+        else:
+            if t < t_in:
+                return None
+            if t < t_out:
+                t_out = t
+    return t_in, t_out
+
+
+def segment_intersects_rectangle(rectangle, line):
+    return clip_segment(rectangle.x, rectangle.y,
+                        rectangle.right, rectangle.top, line) is not None
+
+
+def rectangles_overlap(a, b):
+    '''Overlap of ``a`` with ``b``, where ``a`` is known not to be to the
+    right of ``b``. Same rule coins and bonuses always used: ``a`` has to
+    cross the left border of ``b``, touching vertically is enough.'''
+    return a.right > b.x and a.y <= b.top and a.top >= b.y
+
+
+def _convex_hull(points):
+    '''Counter-clockwise convex hull, monotone chain.'''
+    points = sorted(set(points))
+    if len(points) <= 2:
+        return points
+
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    lower, upper = [], []
+    for point in points:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], point) <= 0:
+            lower.pop()
+        lower.append(point)
+    for point in reversed(points):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], point) <= 0:
+            upper.pop()
+        upper.append(point)
+    return lower[:-1] + upper[:-1]
+
+
+def _clip_segment_by_polygon(polygon, line):
+    '''Cyrus-Beck clipping by a counter-clockwise convex polygon.'''
+    x_a, y_a, x_b, y_b = line
+    d_x, d_y = x_b - x_a, y_b - y_a
+
+    t_in, t_out = 0.0, 1.0
+    for index, (x_v, y_v) in enumerate(polygon):
+        x_n, y_n = polygon[(index + 1) % len(polygon)]
+        # Outward normal of the counter-clockwise edge.
+        n_x, n_y = y_n - y_v, x_v - x_n
+
+        numerator = n_x * (x_a - x_v) + n_y * (y_a - y_v)
+        denominator = n_x * d_x + n_y * d_y
+        if denominator == 0:
+            if numerator > 0:
+                return None
+            continue
+
+        t = -float(numerator) / denominator
+        if denominator < 0:
+            t_in = max(t_in, t)
+        else:
+            t_out = min(t_out, t)
+        if t_in > t_out:
+            return None
+    return t_in, t_out
+
+
+def swept_segment_intersects_rectangle(previous, current, line):
+    '''True if the rectangle moving from ``previous`` to ``current`` box
+    touched the line at any moment between them, so fast objects do not
+    tunnel through thin lines between two frames.'''
+    if (previous.x == current.x and previous.y == current.y and
+            previous.right == current.right and previous.top == current.top):
+        return segment_intersects_rectangle(current, line)
+
+    corners = []
+    for box in (previous, current):
+        corners.extend(((box.x, box.y), (box.right, box.y),
+                        (box.right, box.top), (box.x, box.top)))
+    return _clip_segment_by_polygon(_convex_hull(corners), line) is not None
+
+
+class Broadphase(object):
+
+    '''Sort and sweep over x.
+
+    Objects are kept sorted by their left border. Everything scrolls left
+    with about the same speed, so the order hardly changes and re-sorting
+    it every tick is nearly free. Query walks only the objects to the left
+    of the box right border, and those are the few that already passed
+    the hero, not the ones waiting for him on the right.
+    '''
+
+    def __init__(self):
+        self.__objects = []
+        self.__removed = set()
+        self.tested = 0
+        self.hits = 0
+
+    def __len__(self):
+        return len(self.__objects) - len(self.__removed)
+
+    def add(self, obj):
+        if obj in self.__removed:
+            # Removed lazily, so it is still in the list.
+            self.__removed.discard(obj)
+        else:
+            self.__objects.append(obj)
+
+    def remove(self, obj):
+        self.__removed.add(obj)
+
+    def clear(self):
+        del self.__objects[:]
+        self.__removed.clear()
+
+    def query(self, box):
+        '''Objects whose bounding boxes overlap the box.'''
+        if self.__removed:
+            removed = self.__removed
+            self.__objects = [obj for obj in self.__objects
+                              if obj not in removed]
+            self.__removed = set()
+        self.__objects.sort(key=_get_x)
+
+        candidates = []
+        for obj in self.__objects:
+            if obj.x > box.right:
+                break
+            if obj.right >= box.x and obj.y <= box.top and obj.top >= box.y:
+                candidates.append(obj)
+        return candidates
+
+    def collide(self, box, obj):
+        '''Runs ``candidate._collides_with(obj)`` for candidates in the box.
+
+        Narrowphase returns True on hit, both numbers are counted.
+        '''
+        candidates = self.query(box)
+        self.tested += len(candidates)
+        removed = self.__removed
+        for candidate in candidates:
+            # Removed by a hit of an earlier candidate.
+            if candidate in removed:
+                continue
+            if candidate._collides_with(obj):
+                self.hits += 1
+        return candidates
+
+    def get_stats(self):
+        return dict(objects=len(self), tested=self.tested, hits=self.hits)
+
+
+def _get_x(obj):
+    return obj.x
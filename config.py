@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''Game constants. Nothing here needs Kivy or a window.'''
+
+import collections
+
+FPS = 1.0 / 60.0
+# Logic steps per second, speeds are still given per frame of FPS.
+LOGIC_RATE = 60
+# Steps run at most in one frame, slower devices get slower game instead
+# of never catching up.
+MAX_STEPS_PER_FRAME = 5
+
+TIME_SEGMENT = 0.5
+FUNCTION_TIMING = 0.1
+
+BEZIER_PRECISION = 0.2
+MIN_DISTANCE = 15
+
+# Game objects used to be Image widgets of the default widget size.
+SPRITE_SIZE = (100, 100)
+COIN_SIZE = SPRITE_SIZE
+COIN_COLLECT_TIME = 0.4
+FLYING_SPEED_FACTOR = 1.1
+
+IMMORTALITY_TIME = 3
+HERO_LIVES = 10
+MAX_HERO_LIVES = 3
+COIN_VALUE = 10
+BONUS_VALUE = 200
+JUMP_POINT_VALUE = 30
+MAX_ANGLE = 25
+
+ISLANDS_BEFORE_GUARDIAN = 30
+ENEMY_PROBABILITY = 3
+BONUS_PROBABILITY = 5
+# Between islands at start, in screen factors.
+DISTANCE = 3.5
+# Distance between islands shrinks by a random step of this range after
+# every level, islands per level follow LEVEL_SCHEDULE.
+DISTANCE_STEP = (30, 50)
+LEVEL_SCHEDULE = 'fibonacci'
+# Hero flies up from a jump for width // JUMP_DISTANCE at most.
+JUMP_DISTANCE = 23
+
+# Bodies further than LOD_MARGIN screen factors right of the screen move
+# and think once in LOD_INTERVAL logic steps. The margin grows to what
+# the fastest body moves in the interval, they catch up out of sight.
+LOD_MARGIN = 1.0
+LOD_INTERVAL = 4
+
+# Bodies alive at once at most, spawns over it are refused.
+ENTITY_BUDGET = 200
+
+COIN_POOL_SIZE = 40
+COIN_POOL_PREFILL = 20
+ISLAND_POOL_SIZE = 6
+GUARDIAN_POOL_SIZE = 4
+BONUS_POOL_SIZE = 4
+
+JUMP_LABELS = (None, None, 'Triple', 'Quadro', 'Multiply')
+JUMP_LABEL_TEXT = '%s Jump!'
+
+# Steps of quality the game goes down on slow devices, best first. Coin
+# precision is the arc sample step, render scale is a part of RENDER_SCALE
+# of main.py, LOD fields are LOD_MARGIN and LOD_INTERVAL.
+Quality = collections.namedtuple('Quality', (
+    'name', 'anim_delay', 'coin_precision', 'blink', 'coin_flights',
+    'render_scale', 'lod_margin', 'lod_interval'))
+
+QUALITY_LEVELS = (
+    Quality('high', 0.05, BEZIER_PRECISION, True, True, 1.0,
+            LOD_MARGIN, LOD_INTERVAL),
+    Quality('medium', 0.08, BEZIER_PRECISION, True, True, 0.75,
+            LOD_MARGIN, LOD_INTERVAL),
+    Quality('low', 0.1, 0.25, False, True, 0.6, 0.5, 2 * LOD_INTERVAL),
+    Quality('lowest', 0.15, 1.0 / 3, False, False, 0.5, 0.25,
+            2 * LOD_INTERVAL),
+)
+
+# Islands and coin arcs made ahead by the level worker.
+LEVEL_AHEAD = 4
+
+TEXTURE_DIR = 'texture'
+# Background layers from the farthest, with their speed as a part of the
+# flying objects speed. Too big for the atlas, loaded as they are.
+BACKGROUND_LAYERS = (('background_1.png', 0.15),
+                     ('background_2.png', 0.35),
+                     ('background_3.png', 0.6))
+ATLAS_PATH = 'texture/game.atlas'
+# Sources packed into the atlas. Region names are file names without
+# extension, animation frames are named like hero_00.
+ATLAS_SPRITES = ('coin.png', 'island_small_1.png', 'enemy_draft.png')
+ATLAS_ANIMATIONS = (('hero', 'hero_normal_moving.zip'),)
+# Longest side of a packed image. Sprites are drawn at SPRITE_SIZE, this
+# leaves room for high density screens.
+ATLAS_MAX_SIZE = 256
+ATLAS_PAGE_SIZE = 1024
+
+
+# Balance of the game in one picklable value, batch.py plays it with
+# different ones. See the constants above for the meaning of fields.
+Rules = collections.namedtuple('Rules', (
+    'enemy_probability', 'bonus_probability', 'islands_before_guardian',
+    'distance', 'min_distance', 'distance_step', 'level_schedule',
+    'jump_distance'))
+
+DEFAULT_RULES = Rules(
+    enemy_probability=ENEMY_PROBABILITY,
+    bonus_probability=BONUS_PROBABILITY,
+    islands_before_guardian=ISLANDS_BEFORE_GUARDIAN,
+    distance=DISTANCE, min_distance=MIN_DISTANCE,
+    distance_step=DISTANCE_STEP, level_schedule=LEVEL_SCHEDULE,
+    jump_distance=JUMP_DISTANCE)
+
+
+class Screen(object):
+
+    '''Sizes and speeds that depend on the screen size.'''
+
+    def __init__(self, width, height, rules=DEFAULT_RULES):
+        self.width, self.height = width, height
+
+        self.factor = width // 12
+        self.game_speed = float(width) / 300
+        self.slow_game_speed = int(self.game_speed / 2)
+
+        self.distance = int(rules.distance * self.factor)
+        self.first_point = [1.75 * width, height // 2]
+        self.jump_distance = width // rules.jump_distance
+
+    @property
+    def size(self):
+        return self.width, self.height
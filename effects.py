@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''Tweens of every running effect, updated in one pass.
+
+A tween moves up to WIDTH values from start to end over its duration,
+eased, and calls back when done. Tweens are rows of preallocated arrays
+like bodies in the entity store, a finished row takes the last one, so a
+burst of collected coins allocates nothing. Looping tweens go back and
+forth until removed.
+'''
+
+import array
+import itertools
+import math
+
+WIDTH = 3
+
+
+def linear(t):
+    return t
+
+
+def in_quad(t):
+    return t * t
+
+
+def out_quad(t):
+    return t * (2 - t)
+
+
+def in_out_quad(t):
+    if t < 0.5:
+        return 2 * t * t
+    return -1 + (4 - 2 * t) * t
+
+
+def out_cubic(t):
+    t -= 1
+    return t * t * t + 1
+
+
+def in_out_sine(t):
+    return 0.5 - 0.5 * math.cos(math.pi * t)
+
+
+EASINGS = dict(linear=linear, in_quad=in_quad, out_quad=out_quad,
+               in_out_quad=in_out_quad, out_cubic=out_cubic,
+               in_out_sine=in_out_sine)
+
+COLUMNS = ('time', 'duration') + tuple(
+    '%s_%d' % (name, number) for name in ('start', 'end', 'value')
+    for number in range(WIDTH))
+
+
+def _zeros(size):
+    return array.array('d', [0]) * size
+
+
+class Tweens(object):
+
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.capacity = capacity
+        for name in COLUMNS:
+            setattr(self, name, _zeros(capacity))
+        self.__group_columns()
+        self.easing = [None] * capacity
+        self.loop = [False] * capacity
+        self.on_done = [None] * capacity
+        self.keys = [None] * capacity
+
+        self.__rows = dict()
+        self.__next_key = itertools.count(1)
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, key):
+        return key in self.__rows
+
+    def __group_columns(self):
+        self.__starts, self.__ends, self.__values = [
+            [getattr(self, '%s_%d' % (name, number))
+             for number in range(WIDTH)]
+            for name in ('start', 'end', 'value')]
+
+    def __grow(self):
+        count, capacity = self.count, 2 * self.capacity
+        for name in COLUMNS:
+            new = _zeros(capacity)
+            new[:count] = getattr(self, name)[:count]
+            setattr(self, name, new)
+        self.__group_columns()
+        extra = capacity - self.capacity
+        self.easing.extend([None] * extra)
+        self.loop.extend([False] * extra)
+        self.on_done.extend([None] * extra)
+        self.keys.extend([None] * extra)
+        self.capacity = capacity
+
+    def add(self, start, end, duration, easing='linear', on_done=None,
+            loop=False):
+        '''Starts a tween of values given as sequences of up to WIDTH
+        numbers. Returns its key, on_done is called with it when the
+        tween is over.'''
+        if self.count == self.capacity:
+            self.__grow()
+
+        index = self.count
+        self.time[index] = 0
+        self.duration[index] = duration
+        for number in range(WIDTH):
+            first = start[number] if number < len(start) else 0
+            self.__starts[number][index] = first
+            self.__ends[number][index] = (end[number] if number < len(end)
+                                          else 0)
+            self.__values[number][index] = first
+        self.easing[index] = EASINGS[easing]
+        self.loop[index] = loop
+        self.on_done[index] = on_done
+
+        key = next(self.__next_key)
+        self.keys[index] = key
+        self.__rows[key] = index
+        self.count += 1
+        return key
+
+    def remove(self, key):
+        '''Stops a tween without calling back. Unknown keys are ignored,
+        the tween may be over already.'''
+        index = self.__rows.pop(key, None)
+        if index is None:
+            return
+        last = self.count - 1
+        if index != last:
+            for name in COLUMNS:
+                column = getattr(self, name)
+                column[index] = column[last]
+            for column in (self.easing, self.loop, self.on_done, self.keys):
+                column[index] = column[last]
+            self.__rows[self.keys[index]] = index
+        self.easing[last] = self.on_done[last] = self.keys[last] = None
+        self.count -= 1
+
+    def get(self, key):
+        '''Current values of the tween.'''
+        index = self.__rows[key]
+        return tuple(values[index] for values in self.__values)
+
+    def update(self, timing):
+        time, duration, easing = self.time, self.duration, self.easing
+        starts, ends, values = self.__starts, self.__ends, self.__values
+        done = []
+
+        for index in range(self.count):
+            now = time[index] + timing
+            if now >= duration[index]:
+                if self.loop[index]:
+                    # Goes back from where it is now.
+                    now %= duration[index]
+                    for start, end in zip(starts, ends):
+                        start[index], end[index] = end[index], start[index]
+                else:
+                    now = duration[index]
+                    done.append(self.keys[index])
+            time[index] = now
+
+            progress = easing[index](now / duration[index])
+            for start, end, value in zip(starts, ends, values):
+                value[index] = (start[index] +
+                                (end[index] - start[index]) * progress)
+
+        # Called after the pass, callbacks may add and remove tweens.
+        for key in done:
+            callback = self.on_done[self.__rows[key]]
+            self.remove(key)
+            if callback is not None:
+                callback(key)
+
+    def clear(self):
+        for key in list(self.__rows):
+            self.remove(key)
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''Runs the game logic without a window, as fast as CPU allows.
+
+    python headless.py --seed 1 --size 1280x720 --seconds 300
+    python headless.py --replay session.json
+'''
+
+from __future__ import print_function
+
+import argparse
+import random
+import sys
+import time
+
+from config import FPS
+from profiler import Profiler
+from replay import Replay, get_result, load
+from simulation import Island, Simulation
+
+
+class RandomPlayer(object):
+
+    '''Holds the screen for a random number of ticks, then releases it.
+
+    Has its own generator, so the game random sequence does not depend on
+    how the player plays.
+    '''
+
+    def __init__(self, seed=None, hold=(5, 40), release=(10, 60)):
+        self.random = random.Random(seed)
+        self.hold, self.release = hold, release
+        self.__touching = False
+        self.__next_tick = 0
+
+    def __call__(self, game, tick):
+        if tick < self.__next_tick:
+            return
+
+        if self.__touching:
+            game.touch_up()
+            self.__next_tick = tick + self.random.randint(*self.release)
+        else:
+            game.touch_down()
+            self.__next_tick = tick + self.random.randint(*self.hold)
+        self.__touching = not self.__touching
+
+
+class Bot(object):
+
+    '''Keeps the hero a little above the nearest island ahead, holding
+    the screen while below it.'''
+
+    def __init__(self, margin=0.5):
+        self.margin = margin
+        self.__touching = False
+
+    def __call__(self, game, tick):
+        hero = game.hero
+        if not game.is_started:
+            game.touch_down()
+            self.__touching = True
+            return
+
+        nearest = None
+        for body in game.store:
+            if (isinstance(body, Island) and body.right >= hero.x and
+                    (nearest is None or body.x < nearest.x)):
+                nearest = body
+        target = game.height / 2.0
+        if nearest is not None:
+            target = nearest.top + self.margin * hero.height
+
+        touching = hero.y < target
+        if touching != self.__touching:
+            if touching:
+                game.touch_down()
+            else:
+                game.touch_up()
+            self.__touching = touching
+
+
+def run(ticks, width=1280, height=720, seed=None, timing=FPS, player=None,
+        stop_on_game_over=True, profiler=None, **options):
+    '''Steps simulation ``ticks`` times by ``timing`` seconds each.
+
+    Player is called before every tick as ``player(simulation, tick)``
+    and touches the simulation the way Game widget does. Other options go
+    to the simulation.
+    '''
+    game = Simulation(width, height, seed, profiler, **options)
+    if player is None:
+        player = RandomPlayer(seed)
+
+    profiler = game.profiler
+    for tick in range(ticks):
+        profiler.begin_frame()
+        player(game, tick)
+        game.step(timing)
+        profiler.end_frame()
+        if stop_on_game_over and game.is_over:
+            break
+    return game
+
+
+def replay(session, profiler=None, **options):
+    '''Plays a recorded session through. Returns the game and whether it
+    ended the way the recorded one did. Options go to the simulation.'''
+    width, height = session['size']
+    game = run(session['ticks'], width, height, session['seed'],
+               1.0 / session['rate'], Replay(session),
+               stop_on_game_over=False, profiler=profiler, **options)
+    return game, get_result(game) == session['result']
+
+
+def parse_size(value):
+    width, height = value.lower().split('x')
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--size', type=parse_size, default=(1280, 720),
+                        help='virtual screen, WIDTHxHEIGHT')
+    parser.add_argument('--seconds', type=float, default=60,
+                        help='game time to simulate')
+    parser.add_argument('--fps', type=float, default=1 / FPS,
+                        help='logic steps per second, game speed does not depend on it')
+    parser.add_argument('--keep-going', action='store_true',
+                        help="don't stop on game over")
+    parser.add_argument('--profile', metavar='TRACE',
+                        help='profile the last frames and write trace file')
+    parser.add_argument('--report', action='store_true',
+                        help='print live, recycled and leaked objects')
+    parser.add_argument('--numpy', action='store_true',
+                        help='move and collide with NumPy')
+    parser.add_argument('--replay', metavar='SESSION',
+                        help='play a recorded session, other game options '
+                             'are taken from it')
+    args = parser.parse_args()
+
+    profiler = Profiler(size=10000) if args.profile else None
+    started = time.time()
+    if args.replay:
+        session = load(args.replay)
+        if profiler is None:
+            # Per tick cost over the whole session is what replays are for.
+            profiler = Profiler(size=session['ticks'])
+        game, same = replay(session, profiler, vectorized=args.numpy)
+    else:
+        timing = 1.0 / args.fps
+        game = run(int(args.seconds / timing), args.size[0], args.size[1],
+                   args.seed, timing, stop_on_game_over=not args.keep_going,
+                   profiler=profiler, vectorized=args.numpy)
+    elapsed = time.time() - started
+
+    ticks = game.steps
+    print('seed %s, %dx%d, %d ticks (%.1f s of game) in %.2f s, '
+          '%.0f ticks/s' % (game.seed, game.width, game.height, ticks,
+                            game.time, elapsed, ticks / max(elapsed, 1e-9)))
+    print('points %d, islands %d, lives %d%s' % (
+        game.points, game.number_of_islands, game.hero.lives,
+        ', game over' if game.is_over else ''))
+
+    if profiler:
+        if args.profile:
+            profiler.dump_trace(args.profile)
+        report = profiler.get_report()
+        print('tick       mean %.3f ms, p95 %.3f ms, max %.3f ms' % (
+            report['work']['mean'], report['work']['p95'],
+            report['work']['max']))
+        for name, stats in sorted(report['sections'].items()):
+            print('%-10s mean %.3f ms, p95 %.3f ms, max %.3f ms' % (
+                name, stats['mean'], stats['p95'], stats['max']))
+        print('gc: %(count)d collections, %(time).1f ms' % report['gc'])
+
+    if args.report:
+        report = game.lifecycle.get_report()
+        print('bodies %(total)d of %(budget)d' % report)
+        for name in ('live', 'spawned', 'recycled', 'refused', 'leaked'):
+            print('%-10s %s' % (name, ', '.join(
+                '%s %d' % item for item in sorted(report[name].items()))))
+        print('collision  tested %d, hits %d' % (game.tested, game.hits))
+
+    if args.replay and not same:
+        print('replay differs from the recorded game: %s' % session['result'])
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
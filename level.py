@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''Level content decided ahead of time.
+
+LevelGenerator yields plans of islands (with their guardians and bonuses)
+and coin arcs. Islands and coins roll separate random generators made
+from the game seed, so each stream depends on the seed only, not on when
+the game takes the next item. Stream runs a generator on a worker thread
+a few items ahead, the game only takes ready ones.
+'''
+
+import collections
+import random
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from bezier import bezier
+from config import BEZIER_PRECISION, DEFAULT_RULES, LEVEL_AHEAD, SPRITE_SIZE
+
+
+# Riders are placed by x offset from the island left side. Distance is how
+# far from the right screen side the island has to go before the next one.
+IslandPlan = collections.namedtuple(
+    'IslandPlan', ('number', 'y', 'distance', 'guardian', 'bonus'))
+# Control points of the arc, coins are put on it by the game at the
+# density it wants. Next arc starts when the last coin is gap pixels off
+# the right side.
+CoinArc = collections.namedtuple('CoinArc', ('points', 'gap'))
+
+
+def fibonacci():
+    x, y = 0, 1
+    while True:
+        x, y = y, x + y
+        yield y
+
+
+def linear():
+    '''Level every 5 islands.'''
+    number = 0
+    while True:
+        number += 5
+        yield number
+
+
+def squares():
+    number = 1
+    while True:
+        number += 1
+        yield number * number
+
+
+# Numbers of islands the levels start at.
+LEVEL_SCHEDULES = dict(fibonacci=fibonacci, linear=linear, squares=squares)
+
+
+class LevelGenerator(object):
+
+    def __init__(self, screen, seed=None, rules=DEFAULT_RULES):
+        self.screen = screen
+        self.rules = rules
+        seeds = random.Random(seed)
+        self.island_random = random.Random(seeds.getrandbits(32))
+        self.coin_random = random.Random(seeds.getrandbits(32))
+
+        self.__last_point = list(screen.first_point)
+
+    def islands(self):
+        screen, rand, rules = self.screen, self.island_random, self.rules
+        width, height = SPRITE_SIZE
+        rider_range = width - screen.factor // 2
+
+        distance = screen.distance
+        levels = LEVEL_SCHEDULES[rules.level_schedule]()
+        next_level = next(levels)
+        number = 0
+        while True:
+            number += 1
+            # Distance between islands shrinks at every level.
+            if number == next_level:
+                value = rand.randint(*rules.distance_step)
+                if distance - value > rules.min_distance:
+                    distance -= value
+                    next_level = next(levels)
+
+            y = rand.randint(0, int(screen.height - height))
+            guardian = bonus = None
+            if (rand.randint(0, 10) < rules.enemy_probability and
+                    number >= rules.islands_before_guardian):
+                if rand.randint(0, 10) < rules.bonus_probability:
+                    bonus = rand.randint(0, rider_range)
+                guardian = rand.randint(0, rider_range)
+
+            yield IslandPlan(number, y, distance + rand.randint(0, 50),
+                             guardian, bonus)
+
+    def get_coins_points(self):
+        '''Generates 4 random control points of the next arc.'''
+        width, height = self.screen.size
+        rand = self.coin_random
+        # Copied, the previous arc still needs its last point as it is.
+        points = [list(self.__last_point)]
+
+        quarter = width // 4
+
+        points[0][0] -= 3 * quarter
+
+        areas = [width + quarter,
+                 width + (2 * quarter),
+                 width + (3 * quarter),
+                 2 * width]
+
+        index = 0
+        while index < len(areas) - 1:
+            x = rand.randint(areas[index], areas[index + 1])
+            y = rand.randint(0, height)
+            points.append([x, y])
+            index += 1
+
+        self.__last_point = points[-1]
+        return points
+
+    def get_coins_coords(self, precision=BEZIER_PRECISION):
+        return bezier(self.get_coins_points(), precision)
+
+    def coin_arcs(self):
+        while True:
+            points = self.get_coins_points()
+            yield CoinArc(points, self.coin_random.randint(100, 500))
+
+
+class _Failure(object):
+
+    '''Error of the worker, raised where the item was expected.'''
+
+    def __init__(self, error):
+        self.error = error
+
+
+def _fill(iterable, ready, closed):
+    '''Blocks on the full queue until an item is taken, close takes one
+    to let it see it is closed.'''
+    try:
+        for item in iterable:
+            ready.put(item)
+            if closed.is_set():
+                return
+    except Exception as error:
+        ready.put(_Failure(error))
+
+
+class Stream(object):
+
+    '''Items of an endless generator, made ahead on a worker thread.
+
+    Worker keeps no reference to the stream, so a dropped stream stops
+    its worker. An error of the generator is raised by next() of the
+    item it failed to make, and of every one after it.
+    '''
+
+    def __init__(self, iterable, ahead=LEVEL_AHEAD, threaded=True):
+        self.__iterable = iter(iterable)
+        self.__ready = None
+        self.__failure = None
+        self.__closed = threading.Event()
+        if threaded:
+            self.__ready = queue.Queue(ahead)
+            worker = threading.Thread(
+                target=_fill, args=(self.__iterable, self.__ready,
+                                    self.__closed), name='level')
+            worker.daemon = True
+            worker.start()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.__ready is None:
+            return next(self.__iterable)
+        if self.__failure is None:
+            item = self.__ready.get()
+            if not isinstance(item, _Failure):
+                return item
+            self.__failure = item
+        raise self.__failure.error
+
+    next = __next__
+
+    def close(self):
+        self.__closed.set()
+        if self.__ready is None:
+            return
+        # Frees the worker blocked on the full queue.
+        try:
+            while True:
+                self.__ready.get_nowait()
+        except queue.Empty:
+            pass
+
+    def __del__(self):
+        self.close()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''Counts of live objects per type, to see long sessions grow.
+
+Objects that are not kept by a pool when recycled are expected to be
+freed. They are watched through weak references, the ones still alive
+are reported as leaked.
+'''
+
+import collections
+import gc
+import weakref
+
+
+def get_type_name(obj):
+    cls = type(obj)
+    return '%s.%s' % (cls.__module__, cls.__name__)
+
+
+class Lifecycle(object):
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.live = collections.Counter()
+        self.spawned = collections.Counter()
+        self.recycled = collections.Counter()
+        self.refused = collections.Counter()
+        self.__dropped = weakref.WeakSet()
+
+    def __len__(self):
+        return sum(self.live.values())
+
+    def allows(self, cls):
+        '''False, and the spawn is counted as refused, over the budget.'''
+        if len(self) < self.budget:
+            return True
+        self.refused[cls.__name__] += 1
+        return False
+
+    def on_spawn(self, obj):
+        name = type(obj).__name__
+        self.live[name] += 1
+        self.spawned[name] += 1
+
+    def on_recycle(self, obj, kept):
+        name = type(obj).__name__
+        self.live[name] -= 1
+        self.recycled[name] += 1
+        if not kept:
+            self.drop(obj)
+
+    def drop(self, obj):
+        '''Object nothing should reference anymore.'''
+        self.__dropped.add(obj)
+
+    def get_leaked(self, collect=True):
+        '''Dropped objects still alive, per type. Collecting first frees
+        the ones only kept by reference cycles.'''
+        if collect:
+            gc.collect()
+        return collections.Counter(get_type_name(obj)
+                                   for obj in list(self.__dropped))
+
+    def get_report(self, collect=True):
+        return dict(live=dict(self.live), total=len(self),
+                    budget=self.budget, spawned=dict(self.spawned),
+                    recycled=dict(self.recycled), refused=dict(self.refused),
+                    leaked=dict(self.get_leaked(collect)))
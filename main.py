@@ -1,10 +1,13 @@
 #!/usr/bin/env python
 # -*- coding: UTF-8 -*-
 
-import random
-import sys
-import gc
 import collections
+import os
+
+from profiler import Profiler, StartupTimer
+
+# Made first to count the imports as well.
+STARTUP = StartupTimer()
 
 import kivy
 
@@ -13,739 +16,827 @@ from kivy.app import App
 from kivy.uix.widget import Widget
 from kivy.uix.image import Image
 from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.label import Label
 
-from kivy.core.window import Window
-from kivy.core.audio import SoundLoader
+from kivy.graphics import (ClearBuffers, ClearColor, Color, Fbo, Mesh,
+                           Rectangle, Scale)
 
 from kivy.clock import Clock
-from kivy.animation import Animation
-
-from kivy.properties import NumericProperty, BooleanProperty, StringProperty
-
-
-PLATFORM = kivy.platform()
-
-# if PLATFORM is not 'android':
-    # pass
-    # Window.size = (1100, 650)
-
-
-FPS = 1.0 / 60.0
-FACTOR = Window.width // 12
-GAME_SPEED = float(Window.width) / 300
-SLOW_GAME_SPEED = int(GAME_SPEED / 2)
-
-TIME_SEGMENT = 0.5
-FUNCTION_TIMING = 0.1
-
-BEZIER_PRECISION = 0.2
-MIN_DISTANCE = 15
-DISTANCE = int(3.5 * FACTOR)
-FIRST_POINT = [1.75 * Window.width, Window.height // 2]
+from kivy.logger import Logger
 
-JUMP_DISTANCE = Window.width // 23
-IMMORTALITY_TIME = 3
-HERO_LIVES = 10
-MAX_HERO_LIVES = 3
-COIN_VALUE = 10
-BONUS_VALUE = 200
-JUMP_POINT_VALUE = 30
-MAX_ANGLE = 25
+from kivy.properties import NumericProperty
 
-ISLANDS_BEFORE_GUARDIAN = 30
-ENEMY_PROBABILITY = 3
-BONUS_PROBABILITY = 5
+import simulation
 
-JUMP_LABELS = (None, None, 'Triple', 'Quadro', 'Multiply')
+from assets import AssetLoader
+from config import (BACKGROUND_LAYERS, BONUS_POOL_SIZE, COIN_COLLECT_TIME,
+                    COIN_SIZE, GUARDIAN_POOL_SIZE, ISLAND_POOL_SIZE,
+                    JUMP_LABEL_TEXT, JUMP_LABELS, Screen)
+from effects import Tweens
+from pool import Pool
+from quality import Governor
+from replay import Recorder
+from textures import REGISTRY, Glyphs, get_text
 
+STARTUP.mark('imports')
 
-def fibonacci_decorator(function):
-    prevs = [0, 1]
-
-    def _f():
-        out = function(*prevs)
-        prevs[0], prevs[1] = prevs[1], out
-        return out
-    return _f
-
+# Importing the window creates it.
+from kivy.core.window import Window
 
-def keep_last_point(function):
-    points = [FIRST_POINT]
+STARTUP.mark('window')
 
-    def decorator(self):
-        result = function(self, points)
-        del points[:-1]
-        return result
 
-    return decorator
+PLATFORM = kivy.platform()
 
+# if PLATFORM is not 'android':
+    # pass
+    # Window.size = (1100, 650)
 
-def bezier(points, precision=BEZIER_PRECISION):
-    assert len(points) == 4, len(points)
-    coords = []
 
-    t = precision
-    while t <= 1:
-        x = [((1 - t) ** 3) * points[0][0],
-             3 * t * ((1 - t) ** 2) * points[1][0],
-             3 * (t ** 2) * (1 - t) * points[2][0],
-             (t ** 3) * points[3][0]]
-        y = [((1 - t) ** 3) * points[0][1],
-             3 * t * ((1 - t) ** 2) * points[1][1],
-             3 * (t ** 2) * (1 - t) * points[2][1],
-             (t ** 3) * points[3][1]]
-        coords.append((int(sum(x)), int(sum(y))))
-        t += precision
-    return coords
+SCREEN = Screen(*Window.size)
+FACTOR = SCREEN.factor
+
+# Profiler can be switched on in game with a triple tap as well.
+PROFILER_ENABLED = False
+PROFILER_OVERLAY_TIMING = 1
+# Touches are recorded to play the game again with headless.py --replay.
+RECORD_SESSIONS = True
+# Older sessions in user data are removed, a game writes one every time.
+KEPT_SESSIONS = 20
+# Main thread time spent a frame on making textures of decoded images.
+ASSETS_FRAME_BUDGET = 0.008
+# Game is drawn into a texture of this part of the window size and scaled
+# up to the window, less pixels to fill on big screens. 1 draws straight
+# to the window.
+RENDER_SCALE = 1.0
+MIN_RENDER_SCALE = 0.25
+# Quality goes down on slow devices and back up when frames are fast again.
+QUALITY_GOVERNOR = True
+
+START_TEXT = 'Touch to Start'
+GAME_OVER_TEXT = 'Game Over'
+# Every text the center label shows, rendered while the game loads.
+CENTER_TEXTS = (START_TEXT, GAME_OVER_TEXT) + tuple(
+    JUMP_LABEL_TEXT % label for label in JUMP_LABELS if label)
+
+
+def get_clock_events():
+    '''Scheduled Clock callbacks per type of the object they belong to.'''
+    counts = collections.Counter()
+    for event in Clock.get_events():
+        callback = event.get_callback()
+        owner = getattr(callback, '__self__', None)
+        if callback is None:
+            name = 'dead'
+        elif owner is not None:
+            name = type(owner).__name__
+        else:
+            name = getattr(callback, '__name__', 'function')
+        counts[name] += 1
+    return counts
 
 
 class Hero(Image):
 
+    '''Draws simulation hero.'''
+
     _factor = NumericProperty(FACTOR)
     _angle = NumericProperty(0)
-    __speed = NumericProperty()
-    __lives = NumericProperty(HERO_LIVES)
-    __jump_init_y = NumericProperty(Window.height)
-    is_immortal = BooleanProperty(False)
 
-    def __init__(self):
+    def __init__(self, body, tweens):
         super(Hero, self).__init__()
 
-        # Well... Don't know if that is correct.
-        self.__velocity_up = 0.01 * FACTOR / 6.64
-        self.__velocity_down = 1.2 * self.__velocity_up
-
-        self.__max_up_speed_factor = 0.9
-        self.__max_down_speed_factor = -1.1
+        self.body = body
+        self.tweens = tweens
+        self.blink = True
+        self.__blinking = False
+        # Tween of the hero alpha while blinking.
+        self.__blink = None
 
-        self.__touch = False
-        self.__jumps_count = 0
-
-        self.__intersection_coords = collections.namedtuple(
-            'Coords', ('x', 'y', 'right', 'top'))
-
-        self.center = (FACTOR, Window.center[1])
-        self.source = 'texture/hero_normal_moving.zip'
+        self.size = body.width, body.height
         # self.source = 'texture/1.png'
+        self.__frames = REGISTRY.get_frames('hero')
+        self.__frame = 0
+        self.texture = self.__frames[0]
         self.anim_delay = 0.05
+        Clock.schedule_interval(self.__next_frame, self.anim_delay)
+
+        self.sync()
+
+    def set_quality(self, anim_delay, blink):
+        '''Without blink immortal hero is just drawn half transparent.'''
+        if anim_delay != self.anim_delay:
+            Clock.unschedule(self.__next_frame)
+            self.anim_delay = anim_delay
+            Clock.schedule_interval(self.__next_frame, anim_delay)
+
+        if blink != self.blink:
+            self.blink = blink
+            # Next sync starts the other effect.
+            self.__stop_blink()
+            self.__blinking = False
+
+    def __next_frame(self, timing):
+        self.__frame = (self.__frame + 1) % len(self.__frames)
+        self.texture = self.__frames[self.__frame]
+
+    def __stop_blink(self):
+        if self.__blink is not None:
+            self.tweens.remove(self.__blink)
+            self.__blink = None
+
+    def sync(self, alpha=1):
+        body = self.body
+        self.pos = body.get_interpolated_pos(alpha)
+        self._angle = body.angle
+
+        if body.is_immortal != self.__blinking:
+            self.__blinking = body.is_immortal
+            if self.__blinking and self.blink:
+                self.__blink = self.tweens.add((1,), (0.5,), 0.1,
+                                               'in_out_sine', loop=True)
+            elif self.__blinking:
+                self.color = (1, 1, 1, 0.5)
+            else:
+                self.__stop_blink()
+                self.color = (1, 1, 1, 1)
 
-        Clock.schedule_interval(self.__move, FPS)
-
-    def __up(self, *args):
-        # print 'up'
-        if not self.__touch and self.y - self.__jump_init_y >= JUMP_DISTANCE:
-            # print 'JUMP_DISTANCE TRUE'
-            self.__jump_init_y = Window.height
-            self.down()
-
-        if self.__speed > self.__max_up_speed_factor * self.parent.get_speed():
-            # print '> True'
-            return
-
-        self.__increase_angle()
-        self.__speed += self.__velocity_up
-
-    def __down(self, *args):
-        # print 'down'
-        if (self.__speed <
-                self.__max_down_speed_factor * self.parent.get_speed()):
-            return
-
-        self.__speed -= self.__velocity_down
-        self.__decrease_angle()
-
-    def __increase_angle(self):
-        if self._angle < MAX_ANGLE:
-            self._angle += 1
-
-    def __decrease_angle(self):
-        if self._angle > -10:
-            self._angle -= 1
-
-    def __move(self, timing):
-        ''' Check statement'''
-
-        # print 'Move'
-        if self.top <= 0:
-            self.jump(bottom=True)
-        elif self.y > Window.height + self.height:
-            self.top = Window.height + self.height
-            # return
-        self.y += self.__speed * self.parent.get_speed()
-
-    def __become_mortal(self, timing):
-        self.is_immortal = False
-        self.color = (1, 1, 1, 1)
-        Clock.unschedule(self.__blink)
-
-    def __blink(self, timing):
-        self.color = (1, 1, 1, 1 - self.color[-1] + 0.5)
-
-    def __check_jumps(self):
-        if self.__jumps_count > 5:
-            self.__jumps_count -= 1
-
-        if self.__jumps_count >= 3:
-            self.parent.add_points(self.__jumps_count * JUMP_POINT_VALUE)
-            self.parent.display_jump_label(self.__jumps_count - 1)
-
-        # print self.__jumps_count, JUMP_LABELS[self.__jumps_count - 1]
-
-    def get_intersection_coords(self):
-        x, y = self.x + self.width / 3.0, self.y
-        right, top = x + 2 * self.width / 3.0, y + 4 * self.height / 5.0
-        return self.__intersection_coords(x, y, right, top)
-
-    def lose_life(self):
-        if self.is_immortal:
-            return
-        self.__lives -= 1
-
-        if self.__lives == 0:
-            self.parent.game_over()
-
-        self.is_immortal = True
-        Clock.schedule_once(self.__become_mortal, IMMORTALITY_TIME)
-        Clock.schedule_interval(self.__blink, 0.1)
-
-    def add_life(self):
-        self.__lives += 1
-
-    def jump(self, bottom=False):
-        # print 'Jump'
-        if bottom:
-            self.lose_life()
-        else:
-            self.y += FACTOR / 4.0
-            self.__jumps_count += 1
-            self.__check_jumps()
-
-        self._angle = MAX_ANGLE / 2.0
-        self.__jump_init_y = self.y
-        self.__speed = self.__max_up_speed_factor * self.parent.get_speed()
-        Clock.unschedule(self.__down)
-        Clock.schedule_interval(self.__up, FPS)
-
-    def roll(self):
-        pass
-
-    def up(self):
-        self.__touch = True
-        self.__jumps_count = 0
-        self.__jump_init_y = Window.height
-        Clock.unschedule(self.__down)
-        Clock.schedule_interval(self.__up, FPS)
+        if self.__blink is not None:
+            self.color = (1, 1, 1, self.tweens.get(self.__blink)[0])
 
-    def down(self):
-        self.__touch = False
-        Clock.unschedule(self.__up)
-        Clock.schedule_interval(self.__down, FPS)
 
+class Sprite(Image):
 
-class FlyingObject(Image):
+    '''Draws one object of the simulation. Reused through the pool.'''
 
     _factor = NumericProperty(FACTOR)
+    texture_name = None
 
-    def __init__(self, pos=None, speed_factor=1.1):
-        super(FlyingObject, self).__init__()
-
-        self.__speed_factor = speed_factor
-
-        if not pos:
-            interval = (0, int(Window.height - self.height))
-            pos = Window.width, random.randint(*interval)
-
-        self.pos = pos
-
-        Clock.schedule_interval(self._move, FPS)
-        # try:
-        #     Clock.schedule_interval(
-        #         self._check_if_need_to_create_next, 2 * FPS)
-        # except AttributeError:
-        #     pass
-
-    # def _deal_with_collision(self):
-    #     '''Overwrite in subclasses'''
-    #     pass
+    def __init__(self, body=None):
+        super(Sprite, self).__init__()
 
-    def _collides_with(self, obj):
-        '''Overwrite in subclasses'''
-        return False
+        if self.texture_name:
+            self.texture = REGISTRY.get(self.texture_name)
+        self.reset(body)
 
-    def _check_if_need_to_create_next(self, timing):
-        '''Overwrite in subclasses'''
-        return False
+    def reset(self, body=None):
+        self.body = body
+        if body is not None:
+            self.size = body.width, body.height
+            self.sync()
 
-    def _move(self, *args):
-        if self.right <= 0:
-            self.parent.remove_widget(self)
-            return False
-
-        if self.x <= self.parent.hero.right:
-            self._collides_with(self.parent.hero)
-
-        self.x -= self.get_speed()
-
-    def get_speed(self):
-        try:
-            return self.__speed_factor * self.parent.get_speed()
-        except AttributeError:
-            return 0
-
-
-class Coin(FlyingObject):
-
-    def __init__(self, pos, *args):
-        super(Coin, self).__init__(pos, *args)
-
-        self.source = 'texture/coin.png'
-
-    def _deal_with_collision(self, obj):
-        Clock.unschedule(self._move)
+    def sync(self, alpha=1):
+        self.pos = self.body.get_interpolated_pos(alpha)
 
-        x, y = obj.center
-        anim = Animation(x=x, y=y, size=(0, 0), d=0.4)
-        anim.bind(on_start=lambda *args: self.parent.collect_coin(self))
-        anim.start(self)
 
-    def _check_if_need_to_create_next(self, *args):
-        try:
-            width = self.parent.width
-        except AttributeError:
-            return True
-
-        if self.right <= width - random.randint(100, 500):
-            return not self.parent.add_coins()
-
-    def _collides_with(self, obj):
-        assert self.x <= obj.right
-
-        rectangle = obj.get_intersection_coords()
-        if self.right <= rectangle.x:
-            return False
+class Island(Sprite):
 
-        if self.y <= rectangle.top and self.top >= rectangle.y:
-            self._deal_with_collision(obj)
+    texture_name = 'island_small_1'
 
-
-class Island(FlyingObject):
-    _offset = NumericProperty(0)
-
-    def __init__(self, **kw):
-        super(Island, self).__init__(**kw)
-
-        self.source = 'texture/island_small_1.png'
-        # self._offset = random.choice((0, 30, -30))
-        self._offset = -30
+    def __init__(self, body=None):
+        super(Island, self).__init__(body)
         self.allow_stretch = True
 
-        if random.randint(0, 10) < ENEMY_PROBABILITY:
-            # I need parent widget. Better solution? I don't know
-            Clock.schedule_once(self.__add_guardian, 0.05)
-            # self.__add_bonus()
-
-        Clock.schedule_interval(self._check_if_need_to_create_next, FPS)
-
-    def __add_guardian(self, damn_timing=None):
-        if self.parent.number_of_islands < ISLANDS_BEFORE_GUARDIAN:
-            return False
-
-        if random.randint(0, 10) < BONUS_PROBABILITY:
-            self.__add_bonus()
-
-        guardian = Guardian(
-            pos=(random.randint(int(self.x), int(self.right) - FACTOR / 2), self.top))
-        self.add_widget(guardian)
-
-    def __add_bonus(self):
-        self.add_widget(
-            Bonus(pos=(random.randint(int(self.x), int(self.right) - FACTOR / 2), self.top)))
-
-    def __rectangle_and_segment_intersection(self, rectangle, line):
-        x_min, x_max, y_min, y_max = (rectangle.x, rectangle.right,
-                                      rectangle.y, rectangle.top)
 
-        x_a, y_a, x_b, y_b = line
-
-        t, d_t = 0, 0.1
-        while t <= 1:
-            if (x_min <= (x_a + (x_b - x_a) * t) <= x_max and
-                    y_min <= (y_a + (y_b - y_a) * t) <= y_max):
-                return True
-            t += d_t
-        return False
-
-    def _check_if_need_to_create_next(self, *args):
-        if self.right <= self.parent.get_distance() - random.randint(0, 50):
-            self.parent.add_island()
-            return False
-
-    def _collides_with(self, obj):
-        # lines = ((self.x, self.top, self.center[0] + self._offset, self.y),
-        #         (self.x, self.top, self.right, self.top),
-        #         (self.right, self.top, self.center[0] + self._offset, self.y),)
-        # functions = (self.parent.hero_collided, self.parent.hero.jump,
-        #              self.parent.hero.roll)
-        # for func, line in zip(functions, (damage_line, jump_line, roll_line)):
-        #     if self.__rectangle_and_segment_intersection(self.parent.hero, line):
-        #         func()
-        #         return
-
-        damage_line = self.x, self.top, self.center[0] + self._offset, self.y
-        jump_line = self.x, self.top, self.right, self.top
-        roll_line = self.right, self.top, self.center[0] + self._offset, self.y
-
-        hero = self.parent.hero
-        rectangle = hero.get_intersection_coords()
-
-        if hero.y >= self.top - FACTOR / 4.5:
-            # Don't forget to union this
-            # print self.x
-            # pass
-            if self.__rectangle_and_segment_intersection(rectangle, jump_line):
-                hero.jump()
-            # print 'JUMP'
-
-        elif (not hero.is_immortal and
-              self.__rectangle_and_segment_intersection(rectangle, damage_line)):
-            self.parent.hero_collided()
-            # print 'COLLIDED'
-
-        # elif (self.__rectangle_and_segment_intersection(rectangle, roll_line)):
-        #     hero.roll()
-            # print 'ROLL'
-
-
-class MovingObject(Image):
-
-    ''' Unlike FlyingObject it's walking on island'''
-    _factor = NumericProperty(FACTOR)
-    __speed_factor = NumericProperty()
+class Guardian(Sprite):
 
-    def __init__(self, pos):
-        super(MovingObject, self).__init__()
-        self.pos = pos
-        Clock.schedule_interval(self._move, FPS)
+    texture_name = 'enemy_draft'
 
-    def _collides_with(self, obj):
-        assert self.x <= obj.right
 
-        rectangle = obj.get_intersection_coords()
-        if self.right <= rectangle.x:
-            return False
+class Bonus(Sprite):
+    pass
 
-        if self.y <= rectangle.top and self.top >= rectangle.y:
-            Clock.unschedule(self._move)
-            obj.parent.add_points(BONUS_VALUE)
-            self.parent.remove_widget(self)
-            return True
 
-    def _move(self, timing):
-        if self.right <= 0:
-            self.parent.remove_widget(self)
-            return False
+def add_quad(vertices, x, y, right, top, tex_coords):
+    '''Appends x, y, u, v of the quad corners from the bottom left one,
+    counter-clockwise, the way Rectangle takes tex_coords.'''
+    u0, v0, u1, v1, u2, v2, u3, v3 = tex_coords
+    vertices.extend((x, y, u0, v0, right, y, u1, v1,
+                     right, top, u2, v2, x, top, u3, v3))
 
-        if (self.x <= self.parent.parent.hero.right and
-                self._collides_with(self.parent.parent.hero)):
-            return False
 
-        self.x -= self.parent.get_speed()
+def set_quads(mesh, vertices):
+    '''Draws quads of add_quad as triangles. Indices are only made again
+    when the number of quads changes.'''
+    quads = len(vertices) // 16
+    if len(mesh.indices) != 6 * quads:
+        indices = []
+        for index in range(0, 4 * quads, 4):
+            indices.extend((index, index + 1, index + 2,
+                            index + 2, index + 3, index))
+        mesh.indices = indices
+    mesh.vertices = vertices
 
 
-class Guardian(MovingObject):
+class CoinLayer(Widget):
 
-    def __init__(self, pos):
-        super(Guardian, self).__init__(pos)
+    '''Draws every coin as a quad of one mesh, so all coins cost one
+    texture bind and one draw call.'''
 
-        self.__speed_left = 1.2
-        self.__speed_right = 0.5
-        self.__current_speed = random.choice(
-            (self.__speed_left, self.__speed_right))
-        # self.__current_speed = self.__speed_left
+    def __init__(self, texture, tweens):
+        super(CoinLayer, self).__init__()
 
-        self.source = 'texture/enemy_draft.png'
+        self.tweens = tweens
+        self.__coins = []
+        # Collected coins just disappear without it.
+        self.flights = True
+        # Tweens of collected coins flying to the hero: x, y and size.
+        self.__flights = set()
 
-        if self.__current_speed is self.__speed_left:
-            Clock.schedule_interval(self.__check_if_sees, FPS / 2)
-        # self.__current_speed = self.__speed_right
+        self.__tex_coords = texture.tex_coords
 
-    def __collision_with(self, obj):
-        assert self.x <= obj.right
+        with self.canvas:
+            Color(1, 1, 1, 1)
+            self.__mesh = Mesh(mode='triangles', texture=texture)
 
-        rectangle = obj.get_intersection_coords()
-        if self.right <= rectangle.x:
-            return False
+    def __len__(self):
+        return len(self.__coins) + len(self.__flights)
 
-        if self.y <= rectangle.top and self.top >= rectangle.y:
-            if self.__current_speed == 1:
-                self.__attack(obj)
-                return False
-            else:
-                self.__destroy()
-                return True
+    def add_coin(self, coin):
+        self.__coins.append(coin)
 
-    def __get_hero(self):
+    def remove_coin(self, coin):
         try:
-            return self.parent.parent.hero
-        except AttributeError:
-            return None
-
-    def __check_if_sees(self, timing=None):
-        hero = self.__get_hero()
-
-        if (hero and self.x - hero.right <= Window.height / 2.0
-                and self.y <= hero.top):
-            self.__current_speed = 1
-            return False
-
-    def __attack(self, hero):
-        hero.parent.hero_collided()
+            self.__coins.remove(coin)
+        except ValueError:
+            pass
+
+    def collect(self, coin, target):
+        '''Coin flies to the target shrinking. Only its position is kept,
+        so the simulation may reuse the coin right away.'''
+        self.remove_coin(coin)
+        if not self.flights:
+            return
+        self.__flights.add(self.tweens.add(
+            (coin.x, coin.y, COIN_SIZE[0]), (target[0], target[1], 0),
+            COIN_COLLECT_TIME, 'in_quad', self.__flights.discard))
 
-    def __destroy(self):
-        self.parent.remove_widget(self)
+    def redraw(self, alpha=1):
+        tex_coords = self.__tex_coords
+        vertices = []
 
-    def __get_intercetion_coords(self):
-        offset = self.width / 5
-        return self.x + offset, self.right - offset
+        for coin in self.__coins:
+            x, y = coin.get_interpolated_pos(alpha)
+            add_quad(vertices, x, y, x + coin.width, y + coin.height,
+                     tex_coords)
+        get = self.tweens.get
+        for flight in self.__flights:
+            x, y, size = get(flight)
+            add_quad(vertices, x, y, x + size, y + size, tex_coords)
 
-    def _move(self, timing):
-        hero = self.__get_hero()
+        set_quads(self.__mesh, vertices)
 
-        if hero and self.x <= hero.right:
-            if self.__collision_with(hero):
-                return False
 
-        if self.right <= 0:
-            self.parent.remove_widget(self)
-            return False
+class ParallaxBackground(Widget):
 
-        x, right = self.__get_intercetion_coords()
-        if x <= self.parent.x:
-            self.__current_speed = self.__speed_right
-            Clock.unschedule(self.__check_if_sees)
-        elif right >= self.parent.right:
-            self.__current_speed = self.__speed_left
-            Clock.schedule_interval(self.__check_if_sees, FPS / 2)
+    '''Layers of images repeated along the screen, scrolled slower than
+    the game, the farther the slower.
 
-        self.x -= self.__current_speed * self.parent.get_speed()
+    Every layer is one mesh of a few quads cut from its texture at an
+    offset, scrolling only changes their vertices. The textures need no
+    repeat wrap, which GLES2 has not for non power of two sizes.
+    '''
 
+    def __init__(self, layers):
+        '''Layers are (texture, speed) from the farthest.'''
+        super(ParallaxBackground, self).__init__()
+        self.size = Window.size
 
-class Bonus(MovingObject):
-    pass
+        # (mesh, texture, speed, tile width)
+        self.__layers = []
+        self.__scrolled = None
+
+        width, height = self.size
+        with self.canvas:
+            Color(1, 1, 1, 1)
+            for texture, speed in layers:
+                mesh = Mesh(mode='triangles', texture=texture)
+                tile = float(texture.width) * height / texture.height
+                self.__layers.append((mesh, texture, speed, tile))
+        self.redraw(0)
+
+    def redraw(self, scrolled):
+        if scrolled == self.__scrolled:
+            return
+        self.__scrolled = scrolled
+
+        width, height = self.size
+        for mesh, texture, speed, tile in self.__layers:
+            (u, v0), (u_size, v_size) = texture.uvpos, texture.uvsize
+            u1, v1 = u + u_size, v0 + v_size
+
+            # First quad shows the tile from the offset on, the rest are
+            # whole tiles until the screen is covered.
+            offset = scrolled * speed % tile
+            vertices = []
+            x, left = 0.0, offset / tile
+            while x < width:
+                right = x + tile * (1 - left)
+                u0 = u + left * u_size
+                add_quad(vertices, x, 0, right, height,
+                         (u0, v0, u1, v0, u1, v1, u0, v1))
+                x, left = right, 0.0
+            set_quads(mesh, vertices)
+
+
+class GlyphText(object):
+
+    '''Text of glyphs drawn as one mesh on a canvas. Changing it only
+    changes vertices, no text is rendered.'''
+
+    def __init__(self, canvas, glyphs, pos, height, align='left'):
+        self.glyphs = glyphs
+        self.pos, self.height, self.align = pos, height, align
+        self.__text = None
+
+        with canvas:
+            Color(1, 1, 1, 1)
+            self.__mesh = Mesh(mode='triangles', texture=glyphs.texture)
+
+    def set_text(self, text):
+        if text == self.__text:
+            return
+        self.__text = text
+
+        glyphs, height = self.glyphs, self.height
+        scale = float(height) / glyphs.height
+        widths, coords = [], []
+        # Characters without a glyph are left out.
+        for character in text:
+            if character not in glyphs:
+                continue
+            width, tex_coords = glyphs.get(character)
+            widths.append(width * scale)
+            coords.append(tex_coords)
+
+        x, y = self.pos
+        if self.align == 'right':
+            x -= sum(widths)
+        top = y + height
+        vertices = []
+        for width, tex_coords in zip(widths, coords):
+            add_quad(vertices, x, y, x + width, top, tex_coords)
+            x += width
+        set_quads(self.__mesh, vertices)
+
+
+class CenterLabel(Widget):
+
+    '''One line in the middle of the screen, from cached text textures.'''
+
+    def __init__(self, font_size):
+        super(CenterLabel, self).__init__()
+        self.size = Window.size
+        self.font_size = font_size
+        self.__text = self.__shown = None
 
+        with self.canvas:
+            self.__color = Color(1, 1, 1, 0)
+            self.__rectangle = Rectangle()
 
-class MovingBackground(Widget):
+    def show(self, text):
+        '''Empty text hides the label. Drawn on the next update.'''
+        self.__text = text
 
-    def __init__(self, pos=(0, 0)):
-        super(MovingBackground, self).__init__()
-        self.size = Window.size
+    def update(self):
+        text = self.__text
+        if text == self.__shown:
+            return
+        self.__shown = text
 
-        self.pos = pos
-        # self.allow_stretch = True
-        # self.size_hint_x = 0.2
-        # self.source = 'texture/background_2.png'
+        if not text:
+            self.__color.a = 0
+            return
+        texture = get_text(text, self.font_size)
+        self.__rectangle.texture = texture
+        self.__rectangle.size = texture.size
+        self.__rectangle.pos = (self.center_x - texture.width / 2.0,
+                                self.center_y - texture.height / 2.0)
+        self.__color.a = 1
 
 
 class TopBorder(BoxLayout):
 
-    _points = NumericProperty(0)
+    '''Points on the left, lives on the right. Values are only kept when
+    they change, update draws them once a frame.'''
+
     _factor = NumericProperty(FACTOR)
 
-    def __init__(self):
+    def __init__(self, glyphs):
         super(TopBorder, self).__init__()
         self.pos = 0, Window.height - Window.height // 17
         self.size = Window.width, Window.height // 17
         self.orientation = 'horizontal'
         self.padding, self.spacing = 2, 0
 
+        self.__profile_label = None
+        self.__points = self.__lives = 0
+        self.__dirty = True
+
+        height = 0.8 * self.height
+        y = self.y + (self.height - height) / 2
+        self.__points_text = GlyphText(self.canvas, glyphs, (self.x + 2, y),
+                                       height)
+        self.__lives_text = GlyphText(self.canvas, glyphs,
+                                      (self.right - 2, y), height, 'right')
+
     def set_points(self, value):
-        self._points = value
+        if value != self.__points:
+            self.__points = value
+            self.__dirty = True
+
+    def set_lives(self, value):
+        if value != self.__lives:
+            self.__lives = value
+            self.__dirty = True
+
+    def update(self):
+        if not self.__dirty:
+            return
+        self.__dirty = False
+        self.__points_text.set_text(str(self.__points))
+        self.__lives_text.set_text(str(self.__lives))
+
+    def show_profile(self, text):
+        '''Shows profiler summary in the border, None hides it.'''
+        if text is None:
+            if self.__profile_label:
+                self.remove_widget(self.__profile_label)
+                self.__profile_label = None
+            return
+
+        if not self.__profile_label:
+            self.__profile_label = Label(font_size=self.height / 3.0)
+            self.add_widget(self.__profile_label)
+        self.__profile_label.text = text
 
 
 class Game(Widget):
 
-    __distance_between_islands = NumericProperty(DISTANCE)
-    __speed = NumericProperty()
-    __points = NumericProperty(0)
     _factor = NumericProperty(FACTOR)
-    _center_label_text = StringProperty('Touch to Start')
 
-    @staticmethod
-    @fibonacci_decorator
-    def __get_fibonacci_number(x, y):
-        return x + y
+    render_scale = 1.0
+    quality = None
+    __fbo = None
 
-    def __test(self):
-        self.add_island()
-        self.add_coins()
+    def __get_target(self):
+        '''Canvas children are drawn into.'''
+        return self.canvas if self.__fbo is None else self.__fbo
 
-    def __test_1(self):
-        pass
+    def add_widget(self, widget, *args, **kwargs):
+        canvas = self.canvas
+        self.canvas = self.__get_target()
+        try:
+            return super(Game, self).add_widget(widget, *args, **kwargs)
+        finally:
+            self.canvas = canvas
 
-    def __get_fps(self, timing):
-        return False
-        print Clock.get_rfps()
+    def remove_widget(self, widget, *args, **kwargs):
+        canvas = self.canvas
+        self.canvas = self.__get_target()
+        try:
+            return super(Game, self).remove_widget(widget, *args, **kwargs)
+        finally:
+            self.canvas = canvas
+
+    def set_quality(self, quality):
+        '''Applies a level of config.QUALITY_LEVELS.'''
+        self.quality = quality
+        self.set_render_scale(RENDER_SCALE * quality.render_scale)
+        self.simulation.set_detail(quality.coin_precision, quality.lod_margin,
+                                   quality.lod_interval)
+        if self.__assets is None:
+            self.__set_views_quality()
+
+    def __set_views_quality(self):
+        quality = self.quality
+        if quality is not None:
+            self.hero.set_quality(quality.anim_delay, quality.blink)
+            self.coin_layer.flights = quality.coin_flights
+
+    def set_render_scale(self, scale):
+        '''Draws the game at scale of the window size. Positions and sizes
+        stay in window pixels, only the drawing is scaled.'''
+        scale = max(MIN_RENDER_SCALE, min(1.0, scale))
+        if scale == self.render_scale:
+            return
+        self.render_scale = scale
+
+        # Children are drawn in the reverse order of the list.
+        canvases = [child.canvas for child in reversed(self.children)]
+        self.canvas.clear()
+        self.__fbo = None
+
+        if scale < 1:
+            width, height = self.size
+            self.__fbo = Fbo(size=(max(1, int(width * scale)),
+                                   max(1, int(height * scale))))
+            with self.__fbo:
+                ClearColor(0, 0, 0, 1)
+                ClearBuffers()
+                Scale(scale, scale, 1)
+            self.canvas.add(self.__fbo)
+            with self.canvas:
+                Color(1, 1, 1, 1)
+                Rectangle(pos=self.pos, size=self.size,
+                          texture=self.__fbo.texture)
+
+        target = self.__get_target()
+        for canvas in canvases:
+            target.add(canvas)
+
+    def __show_profile(self, timing=None):
+        if not self.__information_deck:
+            return
 
-    def __change_distance(self, *args):
-        # print self.__speed
-        value = random.randint(30, 50)
+        if self.profiler.enabled:
+            self.profiler.count('widgets', len(self.children))
+            self.profiler.count('coins', len(self.coin_layer))
+            self.profiler.count('clock', sum(get_clock_events().values()))
+            self.__information_deck.show_profile(self.profiler.get_summary())
+        else:
+            self.__information_deck.show_profile(None)
+
+    def get_debug_report(self):
+        '''Live objects of the game and the views, slow: collects garbage
+        to tell leaked objects from not yet collected ones.'''
+        report = self.simulation.lifecycle.get_report()
+        report['widgets'] = sum(1 for _ in self.walk(restrict=True)) - 1
+        report['coin_quads'] = len(self.coin_layer)
+        report['collisions'] = dict(tested=self.simulation.tested,
+                                    hits=self.simulation.hits)
+        report['clock'] = dict(get_clock_events())
+        report['pools'] = dict(
+            (cls.__name__, pool.get_stats())
+            for cls, pool in self.__pools.items())
+        return report
+
+    def toggle_profiler(self):
+        self.profiler.enabled = not self.profiler.enabled
+        if not self.profiler.enabled:
+            self.profiler.clear()
+        self.__show_profile()
+
+    def dump_profile(self, path=None):
+        '''Writes trace of the last profiled frames, returns its path.'''
+        if path is None:
+            path = os.path.join(App.get_running_app().user_data_dir,
+                                'trace.json')
+        self.profiler.dump_trace(path)
+        return path
+
+    def save_session(self, path=None):
+        '''Writes recorded touches of the current game, returns its path.'''
+        if path is None:
+            directory = os.path.join(App.get_running_app().user_data_dir,
+                                     'sessions')
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            path = os.path.join(directory, 'session-%d.json' % (
+                self.simulation.seed))
+            self.__recorder.save(path)
+            self.__remove_old_sessions(directory)
+            return path
+        return self.__recorder.save(path)
+
+    def __remove_old_sessions(self, directory):
+        paths = [os.path.join(directory, name)
+                 for name in os.listdir(directory)
+                 if name.startswith('session-') and name.endswith('.json')]
+        paths.sort(key=os.path.getmtime, reverse=True)
+        for path in paths[KEPT_SESSIONS:]:
+            try:
+                os.remove(path)
+            except OSError as error:
+                Logger.warning('Game: cannot remove %s: %s', path, error)
 
-        if self.__distance_between_islands - value <= MIN_DISTANCE:
+    def __load_textures(self):
+        '''Images are decoded on a worker while the first screen is
+        already drawn and takes touches.'''
+        self.__assets = AssetLoader()
+        REGISTRY.add_jobs(self.__assets)
+        self.__assets.start()
+        self.textures = REGISTRY
+
+    def __poll_assets(self):
+        if not self.__assets.poll(ASSETS_FRAME_BUDGET):
             return False
 
-        self.__distance_between_islands -= value
-        self.__islands_to_next_level = self.__get_fibonacci_number()
-
-    def __load_textures(self):
-        self.textures = dict()
+        for name, error in self.__assets.errors:
+            Logger.error('Assets: %s: %s', name, error)
+        self.__assets = None
+        STARTUP.mark('assets')
+        Logger.info('Startup: %s', STARTUP.get_summary())
+
+        self.__init_views()
+        if self.__pending_touch is not None:
+            self.__init_touch()
+            self.simulation.touch_down()
+            if not self.__pending_touch:
+                self.simulation.touch_up()
+        return True
 
     # def __take_screenshot(self, timing=None, f_=0):
     #     Window.screenshot(name='%s.png' % f_)
     #     Clock.schedule_once(lambda t: self.__take_screenshot(f_=f_+1), 1)
 
     def __init_touch(self):
-        self.__speed = GAME_SPEED
-        self.add_island()
-        self.add_coins()
-        self.__touch_handler = self.hero.up
         # self.remove_widget(
             # [child for child in self.children if isinstance(child, Label)][0])
         # self._center_label_text = ''
 
-        self.__information_deck = TopBorder()
+        self.__information_deck = TopBorder(self.__digits)
+        self.__information_deck.set_points(self.simulation.points)
         self.add_widget(self.__information_deck)
 
         self.__clear_label()
         # Clock.schedule_once(self.__take_screenshot, 1)
 
     def __clear_label(self, timing=None):
-        self._center_label_text = ''
+        self.__center_label.show('')
 
-    def display_jump_label(self, index):
-        self._center_label_text = JUMP_LABELS[index] + ' Jump!'
+    def __display_jump_label(self, text):
+        self.__center_label.show(text)
+        Clock.unschedule(self.__clear_label)
         Clock.schedule_once(self.__clear_label, 3)
 
-    def add_points(self, value=COIN_VALUE):
-        self.__points += value
-        self.__information_deck.set_points(self.__points)
-
-    def hero_collided(self):
-        self.hero.lose_life()
-
-    def remove_object(self, obj):
-        self.remove_widget(obj)
-
-    def collect_coin(self, coin):
-        self.remove_widget(coin)
-        self.add_points()
-
-    def get_distance(self):
-        return self.width - self.__distance_between_islands
-
-    @keep_last_point
-    def get_coins_coords(self, points):
-        '''Generates 4 random points and calls bezier's function with them.'''
-
-        quarter = self.width // 4
-
-        points[0][0] -= 3 * quarter
-
-        areas = [self.width + quarter,
-                 self.width + (2 * quarter),
-                 self.width + (3 * quarter),
-                 2 * self.width]
-
-        index = 0
-        while index < len(areas) - 1:
-            x = random.randint(areas[index], areas[index + 1])
-            y = random.randint(0, self.height)
-            points.append([x, y])
-            index += 1
-
-        return bezier(points)
-
-    def add_coins(self, timing=None):
-        coords = self.get_coins_coords()
-
-        for coord in coords:
-            coin = Coin(pos=coord)
-            self.add_widget(coin)
-        Clock.schedule_interval(coin._check_if_need_to_create_next, FPS)
-        # print coin
-        return True
-
-    def add_island(self):
-        self.number_of_islands += 1
-
-        if self.number_of_islands == self.__islands_to_next_level:
-            self.__change_distance()
+    def __set_points(self, points):
+        self.__information_deck.set_points(points)
+
+    def __update_hud(self):
+        '''Draws what changed since the last frame, however many times.'''
+        if self.__information_deck is not None:
+            self.__information_deck.set_lives(
+                max(0, self.simulation.hero.lives))
+            self.__information_deck.update()
+        self.__center_label.update()
+
+    def __game_over(self):
+        Clock.unschedule(self.__clear_label)
+        self.__center_label.show(GAME_OVER_TEXT)
+        # Dispatched in the middle of a step, the rest of it is not done.
+        self.__ended = True
+
+    def __log_ended_game(self):
+        self.__ended = False
+        if self.__recorder is not None:
+            Logger.info('Session: saved %s', self.save_session())
+        Logger.info('Lifecycle: %s', self.get_debug_report())
+
+    def __add_view(self, widget):
+        '''Adds a view of the game right under the center label.'''
+        index = self.children.index(self.__center_label) + 1
+        self.add_widget(widget, index)
+
+    def __on_spawn(self, body):
+        if isinstance(body, simulation.Coin):
+            self.coin_layer.add_coin(body)
+            return
 
-        self.add_widget(Island())
+        sprite = self.__pools[type(body)].acquire(body)
+        self.__add_view(sprite)
+        self.__sprites[body] = sprite
 
-        # print 'garbage:'
-        # for x in gc.garbage:
-        #     print x
+    def __on_despawn(self, body):
+        if isinstance(body, simulation.Coin):
+            self.coin_layer.remove_coin(body)
+            return
 
-        # print 'hero_refs:', sys.getrefcount(self.hero)
-        # print self.number_of_islands, self.__islands_to_next_level,
-        # self.distance_between_islands
+        sprite = self.__sprites.pop(body)
+        self.remove_widget(sprite)
+        if not self.__pools[type(body)].release(sprite):
+            self.simulation.lifecycle.drop(sprite)
 
-    # def get_hero_object(self):
-    #     return self.hero
+    def __on_collect(self, coin, target):
+        self.coin_layer.collect(coin, target)
 
     def on_touch_down(self, touch):
         # if touch.is_double_tap:
-            # print self.__speed, SLOW_GAME_SPEED, GAME_SPEED
             # if self.__speed == SLOW_GAME_SPEED:
             #     self.__run_time()
             # else:
             #     self.__slow_time()
             # self.__pause_time()
             # self.__decrease_speed()
-        self.hero.up()
-        self.__touch_handler()
+        if touch.is_triple_tap:
+            self.toggle_profiler()
 
-    def on_touch_up(self, touch):
-        # self.hero.set(23, 0, 0, 1)
-        self.hero.down()
+        if self.__assets is not None:
+            # The game starts as soon as loading is over.
+            self.__pending_touch = True
+            return
 
-    def get_speed(self):
-        return self.__speed
+        if not self.simulation.is_started:
+            self.__init_touch()
+        self.simulation.touch_down()
 
-    def game_over(self):
-        self.__speed = 0
-        self._center_label_text = 'Game Over'
+    def on_touch_up(self, touch):
+        # self.hero.set(23, 0, 0, 1)
+        if self.__assets is not None:
+            if self.__pending_touch:
+                self.__pending_touch = False
+            return
+        self.simulation.touch_up()
+
+    def __tick(self, timing):
+        if not self.__first_frame:
+            self.__first_frame = True
+            STARTUP.mark('first_frame')
+        if self.__assets is not None and not self.__poll_assets():
+            self.__center_label.update()
+            return
 
-    def start(self):
+        if self.__governor is not None:
+            quality = self.__governor.update(timing)
+            if quality is not None:
+                Logger.info('Quality: %s, frame %.1f ms', quality.name,
+                            1000 * self.__governor.average)
+                self.set_quality(quality)
+
+        self.profiler.begin_frame()
+        # Logic runs at its own fixed rate, drawing is between its steps.
+        alpha = self.simulation.advance(timing)
+        if self.__ended:
+            self.__log_ended_game()
+
+        with self.profiler.section('render'):
+            self.background.redraw(
+                self.simulation.get_interpolated_scrolled(alpha))
+            self.hero.sync(alpha)
+            for sprite in self.__sprites.values():
+                sprite.sync(alpha)
+
+            with self.profiler.section('effects'):
+                self.tweens.update(timing)
+            self.coin_layer.redraw(alpha)
+            self.__update_hud()
+        self.profiler.end_frame(timing)
+
+    def start(self, seed=None):
         self.size = Window.size
-
-        self.__speed = 0
-        self.number_of_islands = 0
-
-        self.__islands_to_next_level = self.__get_fibonacci_number()
-
-        self.__touch_handler = self.__init_touch
-
-        self.hero = Hero()
-        self.add_widget(self.hero)
-
-        # args = dict(text='Touch to start',
-        #             center=self.center,
-        #             font_size=FACTOR,
-        # self.add_widget(Label(**args))
-
-        # first_island = Island()
-        # first_island.pos = self.hero.x, self.hero.y - first_island.height - 2
-        # self.add_widget(first_island)
-
-        # self.add_widget(MovingBackground())
-
-        # self.__Point = collections.namedtuple('Point', ['x', 'y'])
-        # self.__test()
-
-        Clock.schedule_interval(self.__get_fps, 1)
-        # Clock.schedule_interval(lambda t: self.add_coins(), 1)
-        # Clock.schedule_once(self.__change_distance, 5)
+        self.set_render_scale(RENDER_SCALE)
+        self.__first_frame = False
+        self.__pending_touch = None
+        self.__ended = False
+        self.__load_textures()
+
+        self.profiler = Profiler(enabled=PROFILER_ENABLED)
+        self.__information_deck = None
+
+        # Texts need no assets, the start screen is shown while they load.
+        # They are rendered now, never while playing.
+        self.__digits = Glyphs('0123456789', Window.height // 17)
+        for text in CENTER_TEXTS:
+            get_text(text, FACTOR)
+        self.__center_label = CenterLabel(FACTOR)
+        self.__center_label.show(START_TEXT)
+        self.add_widget(self.__center_label)
+
+        self.simulation = simulation.Simulation(
+            SCREEN.width, SCREEN.height, seed, self.profiler)
+        self.simulation.bind(on_spawn=self.__on_spawn,
+                             on_despawn=self.__on_despawn,
+                             on_collect=self.__on_collect,
+                             on_points=self.__set_points,
+                             on_jump_label=self.__display_jump_label,
+                             on_game_over=self.__game_over)
+        self.__recorder = None
+        if RECORD_SESSIONS:
+            self.__recorder = Recorder(self.simulation)
+
+        self.__governor = Governor() if QUALITY_GOVERNOR else None
+        if self.__governor is not None:
+            self.set_quality(self.__governor.quality)
+
+        # Every frame the window draws, whatever the display rate is.
+        Clock.schedule_interval(self.__tick, 0)
+        Clock.schedule_interval(self.__show_profile, PROFILER_OVERLAY_TIMING)
+
+    def __init_views(self):
+        self.__sprites = dict()
+        self.__pools = {
+            simulation.Island: Pool(Island, ISLAND_POOL_SIZE),
+            simulation.Guardian: Pool(Guardian, GUARDIAN_POOL_SIZE),
+            simulation.Bonus: Pool(Bonus, BONUS_POOL_SIZE),
+        }
+
+        # Layers that failed to load are left out.
+        names = [(os.path.splitext(name)[0], speed)
+                 for name, speed in BACKGROUND_LAYERS]
+        self.background = ParallaxBackground([
+            (REGISTRY.get(name), speed) for name, speed in names
+            if name in REGISTRY])
+        self.__add_view(self.background)
+
+        # Every effect of the views is updated in one pass.
+        self.tweens = Tweens()
+
+        self.hero = Hero(self.simulation.hero, self.tweens)
+        self.__add_view(self.hero)
+
+        self.coin_layer = CoinLayer(REGISTRY.get('coin'), self.tweens)
+        self.__add_view(self.coin_layer)
+        self.__set_views_quality()
 
 
 class YetApp(App):
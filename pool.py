@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''Recycling of game objects instead of constructing new ones.'''
+
+
+class Pool(object):
+
+    '''Hands out released objects again instead of constructing new ones.
+
+    Objects are constructed with ``factory(*args, **kw)``. Recycled object
+    gets the same arguments through its ``reset(*args, **kw)`` method,
+    which has to bring it to the state of a newly constructed one.
+    '''
+
+    def __init__(self, factory, size, prefill=0):
+        self.factory = factory
+        self.size = size
+
+        self.hits = 0
+        self.misses = 0
+        self.dropped = 0
+
+        self.__free = []
+        self.__free_ids = set()
+        for _ in range(min(prefill, size)):
+            self.__keep(factory())
+
+    def __len__(self):
+        return len(self.__free)
+
+    def __keep(self, obj):
+        self.__free.append(obj)
+        self.__free_ids.add(id(obj))
+
+    def acquire(self, *args, **kw):
+        if self.__free:
+            self.hits += 1
+            obj = self.__free.pop()
+            self.__free_ids.discard(id(obj))
+            obj.reset(*args, **kw)
+            return obj
+
+        self.misses += 1
+        return self.factory(*args, **kw)
+
+    def release(self, obj):
+        '''Returns False if pool is full and object is left to the GC.'''
+        if id(obj) in self.__free_ids:
+            return True
+
+        if len(self.__free) >= self.size:
+            self.dropped += 1
+            return False
+
+        self.__keep(obj)
+        return True
+
+    def get_stats(self):
+        return dict(hits=self.hits, misses=self.misses, dropped=self.dropped,
+                    free=len(self.__free), size=self.size)
@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''Per-subsystem frame profiler.
+
+    profiler.begin_frame()
+    with profiler.section('collision'):
+        ...
+    profiler.end_frame(timing)
+
+Section times are exclusive: time of nested sections is not counted in
+the outer one. The last ``size`` frames are kept for the report and can
+be dumped as a trace file for chrome://tracing or Perfetto.
+'''
+
+import collections
+import gc
+import json
+import timeit
+
+
+clock = timeit.default_timer
+
+BUDGET = 1.0 / 60.0
+# Upper bounds of frame time histogram buckets, in milliseconds.
+HISTOGRAM_BUCKETS = (4, 8, 12, 16.7, 20, 33.3, 50, float('inf'))
+
+Frame = collections.namedtuple(
+    'Frame', ('started', 'work', 'interval', 'sections', 'gc_count',
+              'gc_time', 'events'))
+
+
+class _Section(object):
+
+    __slots__ = ('profiler', 'name')
+
+    def __init__(self, profiler, name):
+        self.profiler, self.name = profiler, name
+
+    def __enter__(self):
+        self.profiler._enter(self.name)
+
+    def __exit__(self, *args):
+        self.profiler._exit()
+
+
+class _NoSection(object):
+
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *args):
+        pass
+
+
+_no_section = _NoSection()
+
+
+class Profiler(object):
+
+    def __init__(self, enabled=True, size=600, budget=BUDGET):
+        self.budget = budget
+        self.frames = collections.deque(maxlen=size)
+        self.counts = dict()
+
+        self.__enabled = False
+        self.__sections = dict()
+        self.__stack = []
+        self.__frame_started = None
+        self.__frame_sections = None
+        self.__events = None
+        self.__gc_started = None
+        self.__gc_count = 0
+        self.__gc_time = 0.0
+
+        self.enabled = enabled
+
+    @property
+    def enabled(self):
+        return self.__enabled
+
+    @enabled.setter
+    def enabled(self, value):
+        value = bool(value)
+        if value == self.__enabled:
+            return
+        self.__enabled = value
+
+        # There are no GC callbacks in Python 2, pauses are not counted.
+        callbacks = getattr(gc, 'callbacks', None)
+        if callbacks is None:
+            return
+        if value:
+            callbacks.append(self.__on_gc)
+        elif self.__on_gc in callbacks:
+            callbacks.remove(self.__on_gc)
+
+    def __on_gc(self, phase, info):
+        if phase == 'start':
+            self.__gc_started = clock()
+        elif self.__gc_started is not None:
+            self.__gc_count += 1
+            self.__gc_time += clock() - self.__gc_started
+            self.__gc_started = None
+
+    def section(self, name):
+        if not self.__enabled:
+            return _no_section
+        try:
+            return self.__sections[name]
+        except KeyError:
+            section = self.__sections[name] = _Section(self, name)
+            return section
+
+    def _enter(self, name):
+        self.__stack.append([name, clock(), 0.0])
+
+    def _exit(self):
+        name, started, children = self.__stack.pop()
+        duration = clock() - started
+
+        if self.__stack:
+            self.__stack[-1][2] += duration
+        if self.__frame_sections is not None:
+            sections = self.__frame_sections
+            sections[name] = sections.get(name, 0.0) + duration - children
+            self.__events.append((name, started, duration))
+
+    def count(self, name, value):
+        '''Live numbers shown along with the times, e.g. widgets count.'''
+        self.counts[name] = value
+
+    def begin_frame(self):
+        if not self.__enabled:
+            return
+        self.__frame_started = clock()
+        self.__frame_sections = dict()
+        self.__events = []
+        self.__gc_count, self.__gc_time = 0, 0.0
+
+    def end_frame(self, interval=None):
+        '''Interval is the real time since the previous frame, if known.'''
+        if not self.__enabled or self.__frame_started is None:
+            return
+
+        work = clock() - self.__frame_started
+        self.frames.append(Frame(
+            self.__frame_started, work, interval, self.__frame_sections,
+            self.__gc_count, self.__gc_time, self.__events))
+        self.__frame_started = self.__frame_sections = self.__events = None
+
+    def clear(self):
+        self.frames.clear()
+        self.counts.clear()
+
+    def get_histogram(self):
+        '''Frame counts per bucket of HISTOGRAM_BUCKETS, by frame interval
+        where it is known, by work time otherwise.'''
+        histogram = [0] * len(HISTOGRAM_BUCKETS)
+        for frame in self.frames:
+            time = 1000 * (frame.interval or frame.work)
+            for index, bound in enumerate(HISTOGRAM_BUCKETS):
+                if time <= bound:
+                    histogram[index] += 1
+                    break
+        return list(zip(HISTOGRAM_BUCKETS, histogram))
+
+    def get_report(self):
+        '''Mean, p95 and max in milliseconds over the kept frames.'''
+        frames = list(self.frames)
+        report = dict(frames=len(frames), counts=dict(self.counts))
+        if not frames:
+            return report
+
+        def stats(values):
+            values = sorted(values)
+            return dict(
+                mean=1000 * sum(values) / len(values),
+                p95=1000 * values[int(round(0.95 * (len(values) - 1)))],
+                max=1000 * values[-1])
+
+        names = set()
+        for frame in frames:
+            names.update(frame.sections)
+
+        report['work'] = stats([frame.work for frame in frames])
+        intervals = [frame.interval for frame in frames if frame.interval]
+        if intervals:
+            report['interval'] = stats(intervals)
+        report['sections'] = dict(
+            (name, stats([frame.sections.get(name, 0.0) for frame in frames]))
+            for name in names)
+        report['over_budget'] = sum(
+            1 for frame in frames
+            if (frame.interval or frame.work) > self.budget)
+        report['gc'] = dict(
+            count=sum(frame.gc_count for frame in frames),
+            time=1000 * sum(frame.gc_time for frame in frames))
+        report['histogram'] = self.get_histogram()
+        return report
+
+    def get_summary(self):
+        '''One line for the on-screen overlay.'''
+        report = self.get_report()
+        if not report['frames']:
+            return ''
+
+        frame = report.get('interval', report['work'])
+        parts = ['%.1f ms p95 %.1f' % (frame['mean'], frame['p95'])]
+        parts.extend('%s %.2f' % (name, stats['mean'])
+                     for name, stats in sorted(report['sections'].items()))
+        parts.append('gc %d' % report['gc']['count'])
+        parts.extend('%s %s' % item for item in sorted(report['counts'].items()))
+        return ' | '.join(parts)
+
+    def dump_trace(self, path):
+        '''Writes kept frames in Trace Event Format.'''
+        events = []
+        for number, frame in enumerate(self.frames):
+            events.append(dict(name='frame %d' % number, ph='X', pid=0,
+                               tid=0, ts=1e6 * frame.started,
+                               dur=1e6 * frame.work))
+            for name, started, duration in frame.events:
+                events.append(dict(name=name, ph='X', pid=0, tid=0,
+                                   ts=1e6 * started, dur=1e6 * duration))
+            if frame.gc_count:
+                events.append(dict(name='gc', ph='i', s='t', pid=0, tid=0,
+                                   ts=1e6 * (frame.started + frame.work),
+                                   args=dict(count=frame.gc_count,
+                                             ms=1000 * frame.gc_time)))
+
+        with open(path, 'w') as trace:
+            json.dump(dict(traceEvents=events, displayTimeUnit='ms'), trace)
+        return len(events)
+
+
+class StartupTimer(object):
+
+    '''Cold start phases, each marked once when it ends.
+
+    Time is counted from the timer creation, so it should be made before
+    the heavy imports. Phases may overlap, e.g. assets are loaded while
+    the first frames are drawn.
+    '''
+
+    def __init__(self):
+        self.started = clock()
+        self.marks = []
+
+    def mark(self, name):
+        self.marks.append((name, clock() - self.started))
+
+    def get_report(self):
+        '''Phases as (name, ends at, since previous mark) in ms.'''
+        report, previous = [], 0.0
+        for name, at in sorted(self.marks, key=lambda mark: mark[1]):
+            report.append((name, 1000 * at, 1000 * (at - previous)))
+            previous = at
+        return report
+
+    def get_summary(self):
+        return ', '.join('%s %.0f ms (+%.0f)' % phase
+                         for phase in self.get_report())
+
+
+NULL = Profiler(enabled=False)
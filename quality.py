@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''Quality level picked by measured frame time.
+
+Governor keeps a moving average of frame intervals. When it stays over
+the budget for a while quality goes one level down, when frames come at
+full rate for longer quality goes one level up. Frames never come faster
+than the display refreshes, so full rate is a little over the budget.
+
+The gap between the two thresholds and the longer wait before going up
+keep it from going back and forth between two levels. The wait doubles
+every time quality falls to a level again, up to max_up_after.
+'''
+
+from config import FPS, QUALITY_LEVELS
+
+
+class Governor(object):
+
+    def __init__(self, levels=QUALITY_LEVELS, level=0, budget=FPS,
+                 down=1.25, up=1.05, down_after=1.0, up_after=5.0,
+                 max_up_after=60.0, smoothing=0.05):
+        self.levels = levels
+        self.level = level
+        self.budget = budget
+        self.down, self.up = down, up
+        self.down_after, self.max_up_after = down_after, max_up_after
+        self.smoothing = smoothing
+        # Wait before going up from every level.
+        self.up_after = [up_after] * len(levels)
+
+        self.average = budget
+        self.__over = self.__under = 0.0
+
+    @property
+    def quality(self):
+        return self.levels[self.level]
+
+    def update(self, interval):
+        '''Takes real time of the last frame. Returns the new quality when
+        it changes, None otherwise.'''
+        # One long stall, e.g. the app was paused, is not a slow device.
+        interval = min(interval, 4 * self.budget)
+        self.average += self.smoothing * (interval - self.average)
+
+        if self.average > self.down * self.budget:
+            self.__over += interval
+            self.__under = 0.0
+        elif self.average < self.up * self.budget:
+            self.__under += interval
+            self.__over = 0.0
+        else:
+            self.__over = self.__under = 0.0
+
+        level = self.level
+        if self.__over >= self.down_after and level + 1 < len(self.levels):
+            level += 1
+        elif self.__under >= self.up_after[level] and level > 0:
+            level -= 1
+        else:
+            return None
+
+        if level > self.level:
+            self.up_after[level] = min(2 * self.up_after[level],
+                                       self.max_up_after)
+        self.level = level
+        self.__over = self.__under = 0.0
+        return self.quality
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''Input sessions recorded in game and played again without a window.
+
+Session keeps the seed, the virtual screen size, the logic rate and the
+logic step of every touch and detail change. Simulation depends on
+nothing else, so playing a session again gives the very same game:
+
+    python headless.py --replay session.json
+'''
+
+import json
+
+
+VERSION = 2
+# Detail events go with the arguments of Simulation.set_detail.
+DOWN, UP, DETAIL = 'd', 'u', 'q'
+
+
+def get_result(game):
+    '''What a replay has to end with to be the same game.'''
+    return dict(points=game.points, islands=game.number_of_islands,
+                lives=game.hero.lives, over=game.is_over)
+
+
+class Recorder(object):
+
+    def __init__(self, game):
+        self.game = game
+        self.events = []
+        game.bind(on_touch=self.__on_touch, on_detail=self.__on_detail)
+
+    def __on_touch(self, down):
+        self.events.append((self.game.steps, DOWN if down else UP))
+
+    def __on_detail(self, *args):
+        self.events.append((self.game.steps, DETAIL) + args)
+
+    def get_session(self):
+        '''Only complete between steps, e.g. not from on_game_over that
+        is dispatched in the middle of one.'''
+        game = self.game
+        return dict(version=VERSION, seed=game.seed,
+                    size=[game.width, game.height], rate=game.rate,
+                    ticks=game.steps, events=self.events,
+                    result=get_result(game))
+
+    def save(self, path):
+        with open(path, 'w') as session:
+            json.dump(self.get_session(), session, separators=(',', ':'))
+        return path
+
+
+def load(path):
+    with open(path) as session:
+        session = json.load(session)
+    if session.get('version') != VERSION:
+        raise ValueError('%s: unknown session version %s' % (
+            path, session.get('version')))
+    return session
+
+
+class Replay(object):
+
+    '''Player for headless.run, touches the game at the recorded steps.'''
+
+    def __init__(self, session):
+        self.events = session['events']
+        self.__next = 0
+
+    def __call__(self, game, tick):
+        events = self.events
+        while self.__next < len(events) and events[self.__next][0] <= tick:
+            event = events[self.__next]
+            if event[1] == DOWN:
+                game.touch_down()
+            elif event[1] == UP:
+                game.touch_up()
+            else:
+                game.set_detail(*event[2:])
+            self.__next += 1
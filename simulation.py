@@ -0,0 +1,779 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''Game logic without Kivy.
+
+Simulation is stepped with the time given by the caller, takes the screen
+size from the caller and rolls only its own seeded random generator. So
+the very same game runs in a window (main.py draws it) or headless, as
+fast as CPU allows (headless.py).
+'''
+
+import collections
+import random
+
+import profiler as profiling
+
+from collision import (Broadphase, rectangles_overlap,
+                       swept_segment_intersects_rectangle)
+from bezier import bezier
+from config import (BEZIER_PRECISION, BONUS_POOL_SIZE, BONUS_VALUE, COIN_POOL_PREFILL,
+                    COIN_POOL_SIZE, COIN_SIZE, COIN_VALUE, DEFAULT_RULES,
+                    ENTITY_BUDGET, FLYING_SPEED_FACTOR, FPS, GUARDIAN_POOL_SIZE,
+                    HERO_LIVES, IMMORTALITY_TIME, ISLAND_POOL_SIZE,
+                    JUMP_LABEL_TEXT, JUMP_LABELS, JUMP_POINT_VALUE,
+                    LOD_INTERVAL, LOD_MARGIN,
+                    LOGIC_RATE, MAX_ANGLE,
+                    MAX_STEPS_PER_FRAME, SPRITE_SIZE, Screen)
+from level import LevelGenerator, Stream
+from lifecycle import Lifecycle
+from pool import Pool
+from store import BONUS, COIN, COLLIDABLE, GUARDIAN, HERO, ISLAND, EntityStore
+from world import FixedTimestep, Scheduler, World
+
+
+Coords = collections.namedtuple('Coords', ('x', 'y', 'right', 'top'))
+
+
+class Body(object):
+
+    '''Box with the same coordinate attributes widgets have.
+
+    Coordinates live in a row of the game entity store, body is only a
+    handle to it. Position before the current step is kept there as well,
+    for render interpolation.
+    '''
+
+    __slots__ = ('game', 'store', 'index', '__weakref__')
+
+    size = SPRITE_SIZE
+    kind = None
+    flags = COLLIDABLE
+    speed_factor = 0
+
+    def __init__(self, game=None):
+        self.game = game
+        self.store = None
+        self.index = None
+
+    def attach(self, game):
+        '''Takes a row of the game store, for new and recycled bodies.'''
+        self.game = game
+        self.store = game.store
+        self.store.add(self, self.kind, self.flags, self.speed_factor)
+        self.width, self.height = self.size
+
+    @property
+    def x(self):
+        return self.store.x[self.index]
+
+    @x.setter
+    def x(self, value):
+        self.store.x[self.index] = value
+
+    @property
+    def y(self):
+        return self.store.y[self.index]
+
+    @y.setter
+    def y(self, value):
+        self.store.y[self.index] = value
+
+    @property
+    def width(self):
+        return self.store.width[self.index]
+
+    @width.setter
+    def width(self, value):
+        self.store.width[self.index] = value
+
+    @property
+    def height(self):
+        return self.store.height[self.index]
+
+    @height.setter
+    def height(self, value):
+        self.store.height[self.index] = value
+
+    def catch_up(self):
+        self.store.catch_up(self.index)
+
+    def keep_position(self):
+        store, index = self.store, self.index
+        store.previous_x[index] = store.x[index]
+        store.previous_y[index] = store.y[index]
+
+    def get_interpolated_pos(self, alpha):
+        '''Position between the previous step (0) and the current one (1).'''
+        store, index = self.store, self.index
+        x, y = store.previous_x[index], store.previous_y[index]
+        return (x + (store.x[index] - x) * alpha,
+                y + (store.y[index] - y) * alpha)
+
+    @property
+    def right(self):
+        return self.x + self.width
+
+    @property
+    def top(self):
+        return self.y + self.height
+
+    @top.setter
+    def top(self, value):
+        self.y = value - self.height
+
+    @property
+    def center(self):
+        return self.x + self.width / 2.0, self.y + self.height / 2.0
+
+    @center.setter
+    def center(self, value):
+        self.x = value[0] - self.width / 2.0
+        self.y = value[1] - self.height / 2.0
+
+
+class Hero(Body):
+
+    __slots__ = ('angle', 'lives', 'is_immortal', '__speed',
+                 '__velocity_up', '__velocity_down',
+                 '__max_up_speed_factor', '__max_down_speed_factor',
+                 '__touch', '__jumps_count', '__jump_init_y',
+                 '__vertical_move', '__previous_coords', '__mortal_at')
+
+    kind = HERO
+    flags = 0
+
+    def __init__(self, game):
+        super(Hero, self).__init__(game)
+        self.attach(game)
+        screen = game.screen
+
+        # Well... Don't know if that is correct.
+        self.__velocity_up = 0.01 * screen.factor / 6.64
+        self.__velocity_down = 1.2 * self.__velocity_up
+
+        self.__max_up_speed_factor = 0.9
+        self.__max_down_speed_factor = -1.1
+
+        self.__speed = 0
+        self.__touch = False
+        self.__jumps_count = 0
+        self.__jump_init_y = screen.height
+        self.__vertical_move = None
+        self.__previous_coords = None
+        self.__mortal_at = None
+
+        self.angle = 0
+        self.lives = HERO_LIVES
+        self.is_immortal = False
+
+        self.center = (screen.factor, screen.height / 2.0)
+        self.keep_position()
+
+    # Velocities and speeds are per frame of FPS, every change is scaled
+    # by the number of such frames in the current step.
+
+    def __up(self, timing):
+        if (not self.__touch and
+                self.y - self.__jump_init_y >= self.game.screen.jump_distance):
+            self.__jump_init_y = self.game.height
+            self.down()
+
+        limit = self.__max_up_speed_factor * self.game.get_speed()
+        if self.__speed >= limit:
+            return
+
+        self.__increase_angle()
+        self.__accelerate(self.__velocity_up, limit)
+
+    def __down(self, timing):
+        limit = self.__max_down_speed_factor * self.game.get_speed()
+        if self.__speed <= limit:
+            return
+
+        self.__accelerate(-self.__velocity_down, limit)
+        self.__decrease_angle()
+
+    def __accelerate(self, velocity, limit):
+        '''Speeds up by velocity a frame until the limit, the rest of the
+        step goes on at it. Moves as far as frame by frame would, whatever
+        the step length.'''
+        frames = self.game.frames
+        speeding = min(frames, (limit - self.__speed) / velocity)
+        self.__speed += velocity * speeding
+        self.y += (velocity * speeding * ((speeding - 1) / 2 +
+                                          frames - speeding) *
+                   self.game.get_speed())
+
+    def __increase_angle(self):
+        if self.angle < MAX_ANGLE:
+            self.angle = min(self.angle + self.game.frames, MAX_ANGLE)
+
+    def __decrease_angle(self):
+        if self.angle > -10:
+            self.angle = max(self.angle - self.game.frames, -10)
+
+    def __move(self, timing):
+        height = self.game.height
+        if self.top <= 0:
+            self.jump(bottom=True)
+        elif self.y > height + self.height:
+            self.top = height + self.height
+        self.y += self.__speed * self.game.get_speed() * self.game.frames
+
+    def update(self, timing):
+        if self.is_immortal and self.game.time >= self.__mortal_at:
+            self.is_immortal = False
+
+        self.__previous_coords = self.get_intersection_coords()
+        self.__move(timing)
+        if self.__vertical_move:
+            self.__vertical_move(timing)
+
+    def __check_jumps(self):
+        if self.__jumps_count > 5:
+            self.__jumps_count -= 1
+
+        if self.__jumps_count >= 3:
+            self.game.add_points(self.__jumps_count * JUMP_POINT_VALUE)
+            self.game.display_jump_label(self.__jumps_count - 1)
+
+    def get_intersection_coords(self):
+        x, y = self.x + self.width / 3.0, self.y
+        right, top = x + 2 * self.width / 3.0, y + 4 * self.height / 5.0
+        return Coords(x, y, right, top)
+
+    def get_previous_intersection_coords(self, shift=0):
+        '''Intersection coords before the last move. Shift is added to x,
+        so they can be seen from an object that moved itself meanwhile.'''
+        coords = self.__previous_coords or self.get_intersection_coords()
+        return coords._replace(x=coords.x + shift, right=coords.right + shift)
+
+    def lose_life(self):
+        # Game goes on under the Game Over label, the hero is done.
+        if self.is_immortal or self.game.is_over:
+            return
+        self.lives -= 1
+
+        if self.lives == 0:
+            self.game.game_over()
+
+        self.is_immortal = True
+        self.__mortal_at = self.game.time + IMMORTALITY_TIME
+
+    def add_life(self):
+        self.lives += 1
+
+    def jump(self, bottom=False):
+        if bottom:
+            self.lose_life()
+        else:
+            self.y += self.game.screen.factor / 4.0
+            self.__jumps_count += 1
+            self.__check_jumps()
+
+        self.angle = MAX_ANGLE / 2.0
+        self.__jump_init_y = self.y
+        self.__speed = self.__max_up_speed_factor * self.game.get_speed()
+        self.__vertical_move = self.__up
+
+    def roll(self):
+        pass
+
+    def up(self):
+        self.__touch = True
+        self.__jumps_count = 0
+        self.__jump_init_y = self.game.height
+        self.__vertical_move = self.__up
+
+    def down(self):
+        self.__touch = False
+        self.__vertical_move = self.__down
+
+
+class FlyingObject(Body):
+
+    __slots__ = ()
+
+    speed_factor = FLYING_SPEED_FACTOR
+
+    def __init__(self, game=None, pos=None):
+        super(FlyingObject, self).__init__(game)
+        self.reset(game, pos)
+
+    def reset(self, game=None, pos=None):
+        '''Brings recycled object back to the state of a new one.'''
+        self.game = game
+        if game is None:
+            return
+        self.attach(game)
+
+        if not pos:
+            interval = (0, int(game.height - self.height))
+            pos = game.width, game.random.randint(*interval)
+
+        self.x, self.y = pos
+        self.keep_position()
+
+    def _collides_with(self, obj):
+        '''Overwrite in subclasses'''
+        return False
+
+    def get_speed(self):
+        '''Pixels per frame of FPS.'''
+        if self.game is None:
+            return 0
+        return self.speed_factor * self.game.get_speed()
+
+
+class Coin(FlyingObject):
+
+    __slots__ = ()
+
+    kind = COIN
+
+    size = COIN_SIZE
+
+    def _deal_with_collision(self, obj):
+        self.game.collect_coin(self, obj.center)
+
+    def _collides_with(self, obj):
+        assert self.x <= obj.right
+
+        if rectangles_overlap(self, obj.get_intersection_coords()):
+            self._deal_with_collision(obj)
+            return True
+
+
+class Island(FlyingObject):
+
+    __slots__ = ('offset', 'riders')
+
+    kind = ISLAND
+
+    def reset(self, game=None, pos=None):
+        super(Island, self).reset(game, pos)
+
+        # self.offset = random.choice((0, 30, -30))
+        self.offset = -30
+        self.riders = []
+
+    def populate(self, plan):
+        '''Called by the game once island is registered.'''
+        if plan.bonus is not None:
+            self.game.spawn(Bonus, island=self,
+                            pos=(self.x + plan.bonus, self.top))
+        if plan.guardian is not None:
+            self.game.spawn(Guardian, island=self,
+                            pos=(self.x + plan.guardian, self.top))
+
+    def _collides_with(self, obj):
+        damage_line = self.x, self.top, self.center[0] + self.offset, self.y
+        jump_line = self.x, self.top, self.right, self.top
+        # roll_line = self.right, self.top, self.center[0] + self.offset, self.y
+
+        hero = obj
+        rectangle = hero.get_intersection_coords()
+        # Island has moved left since the previous check, so from its
+        # point of view hero came from the left.
+        previous = hero.get_previous_intersection_coords(
+            -self.get_speed() * self.game.frames)
+
+        if hero.y >= self.top - self.game.screen.factor / 4.5:
+            if swept_segment_intersects_rectangle(
+                    previous, rectangle, jump_line):
+                hero.jump()
+                return True
+
+        elif (not hero.is_immortal and
+              swept_segment_intersects_rectangle(
+                  previous, rectangle, damage_line)):
+            self.game.hero_collided()
+            return True
+
+
+class MovingObject(Body):
+
+    ''' Unlike FlyingObject it's walking on island'''
+
+    __slots__ = ('island', )
+
+    def __init__(self, game=None, island=None, pos=(0, 0)):
+        super(MovingObject, self).__init__(game)
+        self.reset(game, island, pos)
+
+    # Rides along with the island.
+    speed_factor = FLYING_SPEED_FACTOR
+
+    def reset(self, game=None, island=None, pos=(0, 0)):
+        '''Brings recycled object back to the state of a new one.'''
+        self.game = game
+        self.island = island
+        if game is None:
+            return
+        self.attach(game)
+
+        self.x, self.y = pos
+        self.keep_position()
+
+    def _collides_with(self, obj):
+        assert self.x <= obj.right
+
+        if rectangles_overlap(self, obj.get_intersection_coords()):
+            self.game.add_points(BONUS_VALUE)
+            self.game.recycle(self)
+            return True
+
+
+class Guardian(MovingObject):
+
+    __slots__ = ('__current_speed', '__watching')
+
+    kind = GUARDIAN
+
+    __speed_left = 1.2
+    __speed_right = 0.5
+    # Fastest any body moves, relative to the scroll.
+    max_speed_factor = __speed_left * FLYING_SPEED_FACTOR
+
+    def reset(self, game=None, island=None, pos=(0, 0)):
+        super(Guardian, self).reset(game, island, pos)
+
+        if game is None:
+            return
+
+        self.__set_speed(game.random.choice(
+            (self.__speed_left, self.__speed_right)))
+        self.__watching = self.__current_speed is self.__speed_left
+
+    def __set_speed(self, value):
+        self.catch_up()
+        self.__current_speed = value
+        self.store.vx[self.index] = value * self.island.speed_factor
+
+    def _collides_with(self, obj):
+        assert self.x <= obj.right
+
+        if rectangles_overlap(self, obj.get_intersection_coords()):
+            if self.__current_speed == 1:
+                self.game.hero_collided()
+            else:
+                self.game.recycle(self)
+            return True
+
+    def __check_if_sees(self):
+        hero = self.game.hero
+
+        if (self.x - hero.right <= self.game.height / 2.0 and
+                self.y <= hero.top):
+            self.__set_speed(1)
+            self.__watching = False
+
+    def __get_intersection_coords(self):
+        offset = self.width / 5
+        return self.x + offset, self.right - offset
+
+    def update(self, timing):
+        '''Turns around at the island edges, store moves it.'''
+        # Either of them may be far and not moved for a few ticks.
+        self.catch_up()
+        self.island.catch_up()
+
+        x, right = self.__get_intersection_coords()
+        if x <= self.island.x:
+            self.__set_speed(self.__speed_right)
+            self.__watching = False
+        elif right >= self.island.right:
+            self.__set_speed(self.__speed_left)
+            self.__watching = True
+
+        if self.__watching:
+            self.__check_if_sees()
+
+
+class Bonus(MovingObject):
+
+    __slots__ = ()
+
+    kind = BONUS
+
+
+class Simulation(object):
+
+    '''Everything Game widget used to decide, without drawing anything.
+
+    Views follow the simulation through events, bound the way Kivy events
+    are: ``simulation.bind(on_spawn=callback)``.
+    '''
+
+    __events__ = ('on_spawn', 'on_despawn', 'on_collect', 'on_points',
+                  'on_jump_label', 'on_game_over', 'on_touch', 'on_detail')
+
+    def __init__(self, width, height, seed=None, profiler=None,
+                 rate=LOGIC_RATE, threaded=True, vectorized=False,
+                 rules=DEFAULT_RULES, budget=ENTITY_BUDGET):
+        self.rules = rules
+        self.screen = Screen(width, height, rules)
+        self.profiler = profiler or profiling.NULL
+        self.timestep = FixedTimestep(rate, MAX_STEPS_PER_FRAME)
+        self.width, self.height = width, height
+
+        # Always known, so any game can be recorded and played again.
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 32)
+        self.seed = seed
+        self.rate = rate
+        self.random = random.Random(seed)
+
+        self.time = 0.0
+        # Completed steps, events between steps are recorded by it.
+        self.steps = 0
+        # How far flying objects have moved, spawns are scheduled by it.
+        self.scrolled = 0.0
+        self.previous_scrolled = 0.0
+        # Frames of FPS in the current step, movement is scaled by it.
+        self.frames = 1.0
+        self.points = 0
+        self.number_of_islands = 0
+        # Narrowphase tests and hits of the hero, on either path.
+        self.tested = self.hits = 0
+        self.is_started = False
+        self.is_over = False
+
+        self.__speed = 0
+        self.__callbacks = dict((name, []) for name in self.__events__)
+
+        # NumPy only pays off with far more bodies than a game has.
+        self.store = EntityStore(vectorized=vectorized)
+        # Bodies this far right are out of sight and reach, they move and
+        # think once in LOD_INTERVAL ticks.
+        self.lod_boundary = self.__get_lod_boundary(LOD_MARGIN, LOD_INTERVAL)
+        self.lod_interval = LOD_INTERVAL
+        # Coin arcs are sampled at this step.
+        self.coin_precision = BEZIER_PRECISION
+        # Only bodies with behaviour of their own, store moves them all.
+        self.world = World(self.is_near, LOD_INTERVAL)
+        self.scheduler = Scheduler()
+        self.lifecycle = Lifecycle(budget)
+        self.broadphase = Broadphase()
+        self.pools = {
+            Coin: Pool(Coin, COIN_POOL_SIZE, COIN_POOL_PREFILL),
+            Island: Pool(Island, ISLAND_POOL_SIZE),
+            Guardian: Pool(Guardian, GUARDIAN_POOL_SIZE),
+            Bonus: Pool(Bonus, BONUS_POOL_SIZE),
+        }
+
+        # Hero is updated apart from the world, to be profiled apart.
+        self.hero = Hero(self)
+
+        # Without threads the level is made right when it is needed.
+        self.level = LevelGenerator(self.screen, seed, rules)
+        self.__islands = Stream(self.level.islands(), threaded=threaded)
+        self.__coin_arcs = Stream(self.level.coin_arcs(), threaded=threaded)
+
+    def bind(self, **callbacks):
+        for name, callback in callbacks.items():
+            self.__callbacks[name].append(callback)
+
+    def dispatch(self, name, *args):
+        for callback in self.__callbacks[name]:
+            callback(*args)
+
+    def __start(self):
+        self.is_started = True
+        self.__speed = self.screen.game_speed
+        self.add_island()
+        self.add_coins()
+
+    def touch_down(self):
+        self.dispatch('on_touch', True)
+        self.hero.up()
+        if not self.is_started:
+            self.__start()
+
+    def touch_up(self):
+        self.dispatch('on_touch', False)
+        self.hero.down()
+
+    def set_detail(self, coin_precision, lod_margin, lod_interval):
+        '''Changes how detailed the game is, e.g. on a slow device. Takes
+        effect from the next coin arc and the next step.'''
+        self.dispatch('on_detail', coin_precision, lod_margin, lod_interval)
+        self.coin_precision = coin_precision
+        self.lod_boundary = self.__get_lod_boundary(lod_margin, lod_interval)
+        self.lod_interval = lod_interval
+
+    def __get_lod_boundary(self, margin, interval):
+        '''Bodies right of the boundary catch up a move of up to interval
+        steps at once, the margin is never less so they land out of
+        sight.'''
+        frames = self.timestep.timing / FPS
+        catch_up = (interval * Guardian.max_speed_factor *
+                    self.screen.game_speed * frames)
+        return self.width + max(margin * self.screen.factor, catch_up)
+
+    def advance(self, elapsed):
+        '''Runs as many fixed steps as fit into the elapsed real time.
+
+        Returns how far the leftover time is into the next step, from 0
+        to 1, to interpolate drawn positions with.
+        '''
+        timestep = self.timestep
+        for _ in range(timestep.advance(elapsed)):
+            self.step(timestep.timing)
+        return timestep.alpha
+
+    def step(self, timing):
+        self.time += timing
+        self.frames = timing / FPS
+
+        profiler = self.profiler
+        self.store.keep_positions()
+        with profiler.section('hero'):
+            self.hero.update(timing)
+        with profiler.section('movement'):
+            self.move(timing)
+        self.previous_scrolled = self.scrolled
+        self.scrolled += FLYING_SPEED_FACTOR * self.__speed * self.frames
+        self.scheduler.advance(self.scrolled)
+        with profiler.section('collision'):
+            self.__check_collisions()
+        profiler.count('entities', len(self.store))
+        self.steps += 1
+
+    def get_interpolated_scrolled(self, alpha):
+        previous = self.previous_scrolled
+        return previous + (self.scrolled - previous) * alpha
+
+    def is_near(self, body):
+        return body.x <= self.lod_boundary
+
+    def move(self, timing):
+        '''Runs behaviours, then moves every body in one pass.'''
+        self.world.interval = self.lod_interval
+        self.world.tick(timing)
+
+        boundary = self.lod_boundary
+        if self.world.ticks % self.lod_interval == 0:
+            boundary = None
+        distance = self.__speed * self.frames
+        for entity in self.store.scroll(distance, boundary):
+            # Riders go together with their island.
+            if entity.index is not None:
+                self.recycle(entity)
+
+    def __check_collisions(self):
+        '''Narrowphase runs only for objects near the hero box, widened to
+        where the box was before the last move as islands see it.'''
+        current = self.hero.get_intersection_coords()
+        previous = self.hero.get_previous_intersection_coords(
+            -FLYING_SPEED_FACTOR * self.__speed * self.frames)
+
+        box = current._replace(x=min(current.x, previous.x),
+                               y=min(current.y, previous.y),
+                               top=max(current.top, previous.top))
+        self.collide(box)
+
+    def collide(self, box):
+        '''Runs hero narrowphase of bodies overlapping the box.'''
+        if not self.store.vectorized:
+            hits = self.broadphase.hits
+            tested = len(self.broadphase.collide(box, self.hero))
+            hits = self.broadphase.hits - hits
+        else:
+            # Rows move when bodies are recycled, so candidates are taken
+            # as handles.
+            handles = self.store.handles
+            candidates = [handles[index] for index in self.store.overlaps(box)]
+            tested, hits = len(candidates), 0
+            for candidate in candidates:
+                if (candidate.index is not None and
+                        candidate._collides_with(self.hero)):
+                    hits += 1
+
+        self.tested += tested
+        self.hits += hits
+        self.profiler.count('tested', tested)
+        self.profiler.count('hits', hits)
+
+    def get_speed(self):
+        return self.__speed
+
+    def display_jump_label(self, index):
+        self.dispatch('on_jump_label', JUMP_LABEL_TEXT % JUMP_LABELS[index])
+
+    def add_points(self, value=COIN_VALUE):
+        self.points += value
+        self.dispatch('on_points', self.points)
+
+    def hero_collided(self):
+        self.hero.lose_life()
+
+    def game_over(self):
+        self.__speed = 0
+        self.is_over = True
+        self.dispatch('on_game_over')
+
+    def spawn(self, cls, **kw):
+        '''Takes object from the pool and registers it in the world.
+        Returns None when there are as many bodies as the budget allows.'''
+        if not self.lifecycle.allows(cls):
+            return None
+
+        entity = self.pools[cls].acquire(self, **kw)
+        if isinstance(entity, MovingObject):
+            entity.island.riders.append(entity)
+        if not self.store.vectorized:
+            self.broadphase.add(entity)
+        if hasattr(entity, 'update'):
+            self.world.spawn(entity)
+        self.lifecycle.on_spawn(entity)
+        self.dispatch('on_spawn', entity)
+        return entity
+
+    def recycle(self, entity):
+        '''Removes object from the world and gives it back to the pool.'''
+        self.world.despawn(entity)
+        if not self.store.vectorized:
+            self.broadphase.remove(entity)
+        self.store.remove(entity)
+
+        if isinstance(entity, Island):
+            for rider in entity.riders[:]:
+                self.recycle(rider)
+        elif isinstance(entity, MovingObject):
+            entity.island.riders.remove(entity)
+
+        self.dispatch('on_despawn', entity)
+        self.lifecycle.on_recycle(entity,
+                                  self.pools[type(entity)].release(entity))
+
+    def collect_coin(self, coin, target):
+        self.dispatch('on_collect', coin, target)
+        self.recycle(coin)
+        self.add_points()
+
+    def add_coins(self):
+        '''Adds the next arc and schedules the one after it, for when the
+        last coin is the arc gap off the right side.'''
+        with self.profiler.section('spawn'):
+            arc = next(self.__coin_arcs)
+            coords = bezier(arc.points, self.coin_precision)
+
+            for coord in coords:
+                self.spawn(Coin, pos=coord)
+            last = coords[-1][0] + COIN_SIZE[0]
+            self.scheduler.at(self.scrolled + last - self.width + arc.gap,
+                              self.add_coins)
+
+    def add_island(self):
+        '''Adds the next island and schedules the one after it, for when
+        this one is the plan distance off the right side.'''
+        with self.profiler.section('spawn'):
+            plan = next(self.__islands)
+            self.number_of_islands = plan.number
+            island = self.spawn(Island, pos=(self.width, plan.y))
+            if island is not None:
+                island.populate(plan)
+            self.scheduler.at(self.scrolled + SPRITE_SIZE[0] + plan.distance,
+                              self.add_island)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''Entity data kept by columns.
+
+Every column is an array with a row per live entity, so the simulation
+moves everything in one loop over plain numbers and NumPy can view the
+very same memory. Entities are small handles that know their row. Rows
+stay dense: removing one moves the last row into its place.
+
+Movement and overlap tests are done in a plain loop, or on whole columns
+with NumPy when the store is made vectorized. NumPy has a fixed cost a
+call that only pays off past about a hundred rows, and a game has about
+twenty, so the loop is the default.
+'''
+
+import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Floats. Previous position is the one before the current step, vx is the
+# leftward speed as a factor of the game speed. Far rows are moved less
+# often, moved_at is the scrolled distance they were last moved at.
+COLUMNS = ('x', 'y', 'width', 'height', 'previous_x', 'previous_y', 'vx',
+           'moved_at')
+
+# Kinds.
+HERO, COIN, ISLAND, GUARDIAN, BONUS = range(5)
+
+# Flags.
+COLLIDABLE = 1
+
+
+def _zeros(typecode, size):
+    return array.array(typecode, [0]) * size
+
+
+class EntityStore(object):
+
+    def __init__(self, capacity=64, vectorized=False):
+        if vectorized and numpy is None:
+            raise ImportError('vectorized store needs NumPy')
+        self.vectorized = vectorized
+
+        self.count = 0
+        self.capacity = capacity
+        self.scrolled = 0.0
+        # Grows when columns are replaced by bigger ones, views of the old
+        # ones have to be made again.
+        self.version = 0
+        self.handles = []
+        self.__views = None
+        self.__views_version = None
+
+        for name in COLUMNS:
+            setattr(self, name, _zeros('d', capacity))
+        self.kind = _zeros('B', capacity)
+        self.flags = _zeros('B', capacity)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return iter(list(self.handles))
+
+    def __grow(self):
+        count, capacity = self.count, 2 * self.capacity
+        for name in COLUMNS + ('kind', 'flags'):
+            old = getattr(self, name)
+            new = _zeros(old.typecode, capacity)
+            new[:count] = old[:count]
+            setattr(self, name, new)
+        self.capacity = capacity
+        self.version += 1
+
+    def add(self, handle, kind, flags=0, vx=0):
+        '''Gives the handle a zeroed row.'''
+        if self.count == self.capacity:
+            self.__grow()
+
+        index = self.count
+        for name in COLUMNS:
+            getattr(self, name)[index] = 0
+        self.vx[index] = vx
+        self.moved_at[index] = self.scrolled
+        self.kind[index] = kind
+        self.flags[index] = flags
+
+        self.handles.append(handle)
+        handle.index = index
+        self.count += 1
+        return index
+
+    def remove(self, handle):
+        index, last = handle.index, self.count - 1
+        if index != last:
+            for name in COLUMNS + ('kind', 'flags'):
+                column = getattr(self, name)
+                column[index] = column[last]
+            moved = self.handles[last]
+            self.handles[index] = moved
+            moved.index = index
+
+        self.handles.pop()
+        self.count -= 1
+        handle.index = None
+
+    def keep_positions(self):
+        count = self.count
+        self.previous_x[:count] = self.x[:count]
+        self.previous_y[:count] = self.y[:count]
+
+    def get_views(self):
+        '''NumPy arrays sharing memory with the columns, sliced to live
+        rows.'''
+        if self.__views_version != self.version:
+            self.__views = dict(
+                (name, numpy.frombuffer(getattr(self, name),
+                                        dtype=getattr(self, name).typecode))
+                for name in COLUMNS + ('kind', 'flags'))
+            self.__views_version = self.version
+        count = self.count
+        return dict((name, view[:count])
+                    for name, view in self.__views.items())
+
+    def scroll(self, distance, boundary=None):
+        '''Scrolls everything by distance. Rows right of the boundary are
+        left where they are until a scroll without one, then they catch
+        up at once. Returns handles that have left the screen.'''
+        self.scrolled = scrolled = self.scrolled + distance
+        if boundary is None:
+            boundary = float('inf')
+
+        if self.vectorized:
+            views = self.get_views()
+            x, vx, moved_at = views['x'], views['vx'], views['moved_at']
+            near = (x <= boundary) & (vx != 0)
+            x -= vx * numpy.where(near, scrolled - moved_at, 0)
+            moved_at[near] = scrolled
+            gone = numpy.flatnonzero(near & (x + views['width'] <= 0))
+            return [self.handles[index] for index in gone]
+
+        x, width, vx, moved_at = self.x, self.width, self.vx, self.moved_at
+        gone = []
+        for index in range(self.count):
+            if vx[index] and x[index] <= boundary:
+                x[index] -= vx[index] * (scrolled - moved_at[index])
+                moved_at[index] = scrolled
+                if x[index] + width[index] <= 0:
+                    gone.append(self.handles[index])
+        return gone
+
+    def catch_up(self, index):
+        '''Moves a far row to where it would be if scrolled every time.'''
+        scrolled = self.scrolled
+        self.x[index] -= self.vx[index] * (scrolled - self.moved_at[index])
+        self.moved_at[index] = scrolled
+
+    def overlaps(self, box, flags=COLLIDABLE):
+        '''Rows with any of the flags whose boxes overlap the box, ordered
+        by x the way the broadphase finds them.'''
+        if self.vectorized:
+            views = self.get_views()
+            x, y = views['x'], views['y']
+            hits = numpy.flatnonzero(
+                (views['flags'] & flags != 0) &
+                (x <= box.right) & (x + views['width'] >= box.x) &
+                (y <= box.top) & (y + views['height'] >= box.y))
+            return hits[numpy.argsort(x[hits], kind='mergesort')].tolist()
+
+        x, y, width, height = self.x, self.y, self.width, self.height
+        hits = [index for index in range(self.count)
+                if self.flags[index] & flags and
+                x[index] <= box.right and x[index] + width[index] >= box.x and
+                y[index] <= box.top and y[index] + height[index] >= box.y]
+        hits.sort(key=x.__getitem__)
+        return hits
+
+    def clear(self):
+        for handle in self.handles:
+            handle.index = None
+        del self.handles[:]
+        self.count = 0
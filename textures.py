@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''Textures of the game, loaded once at start and shared by all widgets.
+
+Regions come from the atlas made by build_atlas.py, so sprites of one
+page are drawn without rebinding textures. Without the atlas the
+separate files are loaded instead. Images are decoded by AssetLoader
+worker, only textures are made on the main thread.
+
+Texts are rendered once as well: fixed ones into a texture each, numbers
+from glyphs of one texture.
+'''
+
+import json
+import os
+
+from kivy.core.image import ImageLoader
+from kivy.core.text import Label as CoreLabel
+from kivy.graphics.texture import Texture
+from kivy.logger import Logger
+
+from assets import AssetLoader
+from config import (ATLAS_ANIMATIONS, ATLAS_PATH, ATLAS_SPRITES,
+                    BACKGROUND_LAYERS, TEXTURE_DIR)
+
+
+def decode(path):
+    return ImageLoader.load(path, nocache=True)
+
+
+class Textures(object):
+
+    def __init__(self):
+        self.__textures = dict()
+        self.__frames = dict()
+        self.__empty = None
+
+    def __contains__(self, name):
+        return name in self.__textures
+
+    def add_jobs(self, loader, atlas_path=ATLAS_PATH):
+        '''Adds decoding of every texture to the loader.'''
+        for name, speed in BACKGROUND_LAYERS:
+            loader.add(name, lambda name=name: decode(
+                os.path.join(TEXTURE_DIR, name)),
+                lambda image, name=name: self.__add(
+                    os.path.splitext(name)[0], image.texture))
+
+        if os.path.exists(atlas_path):
+            with open(atlas_path) as atlas:
+                pages = json.load(atlas)
+            directory = os.path.dirname(atlas_path)
+            for page, regions in sorted(pages.items()):
+                loader.add(page, lambda page=page: decode(
+                    os.path.join(directory, page)),
+                    lambda image, regions=regions: self.__add_regions(
+                        image.texture, regions))
+            return
+
+        Logger.warning('Textures: no %s, run build_atlas.py', atlas_path)
+        for name in ATLAS_SPRITES:
+            loader.add(name, lambda name=name: decode(
+                os.path.join(TEXTURE_DIR, name)),
+                lambda image, name=name: self.__add(
+                    os.path.splitext(name)[0], image.texture))
+        for name, archive in ATLAS_ANIMATIONS:
+            loader.add(archive, lambda archive=archive: decode(
+                os.path.join(TEXTURE_DIR, archive)),
+                lambda image, name=name: self.__add_frames(
+                    name, image.textures))
+
+    def load(self, atlas_path=ATLAS_PATH):
+        '''Loads everything right away.'''
+        loader = AssetLoader()
+        self.add_jobs(loader, atlas_path)
+        loader.wait()
+        return loader
+
+    def __add(self, name, texture):
+        self.__textures[name] = texture
+
+    def __add_regions(self, texture, regions):
+        for name, (x, y, width, height) in regions.items():
+            self.__textures[name] = texture.get_region(x, y, width, height)
+
+    def __add_frames(self, name, textures):
+        for index, texture in enumerate(textures):
+            self.__textures['%s_%02d' % (name, index)] = texture
+
+    def get_empty(self):
+        '''Transparent texture drawn for ones that failed to load.'''
+        if self.__empty is None:
+            self.__empty = Texture.create(size=(1, 1), colorfmt='rgba')
+            self.__empty.blit_buffer(b'\x00' * 4, colorfmt='rgba',
+                                     bufferfmt='ubyte')
+        return self.__empty
+
+    def get(self, name):
+        '''Missing textures are drawn empty, the game goes on without.'''
+        try:
+            return self.__textures[name]
+        except KeyError:
+            Logger.error('Textures: no %s, drawn empty', name)
+            texture = self.__textures[name] = self.get_empty()
+            return texture
+
+    def get_frames(self, name):
+        '''Animation frames in order, cached after the first call. One
+        empty frame when there are none.'''
+        try:
+            return self.__frames[name]
+        except KeyError:
+            prefix = name + '_'
+            frames = self.__frames[name] = [
+                self.__textures[key] for key in sorted(self.__textures)
+                if key.startswith(prefix) and key[len(prefix):].isdigit()]
+            if not frames:
+                Logger.error('Textures: no frames of %s, drawn empty', name)
+                frames.append(self.get_empty())
+            return frames
+
+
+REGISTRY = Textures()
+
+_texts = dict()
+
+
+def render_text(text, font_size):
+    label = CoreLabel(text=text, font_size=font_size)
+    label.refresh()
+    return label, label.texture
+
+
+def get_text(text, font_size):
+    '''Texture of the text, rendered on the first call only.'''
+    try:
+        return _texts[text, font_size]
+    except KeyError:
+        texture = _texts[text, font_size] = render_text(text, font_size)[1]
+        return texture
+
+
+class Glyphs(object):
+
+    '''Characters rendered side by side into one texture, so texts of
+    them are drawn as quads of its regions without rendering anything.'''
+
+    def __init__(self, characters, font_size):
+        label, texture = render_text(characters, font_size)
+        self.texture = texture
+        self.height = texture.height
+
+        # Character: (width, tex_coords).
+        self.__glyphs = dict()
+        left = 0
+        for index, character in enumerate(characters):
+            right = label.get_extents(characters[:index + 1])[0]
+            region = texture.get_region(left, 0, right - left, texture.height)
+            self.__glyphs[character] = (right - left, region.tex_coords)
+            left = right
+
+    def __contains__(self, character):
+        return character in self.__glyphs
+
+    def get(self, character):
+        return self.__glyphs[character]
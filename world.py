@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+'''One update loop for everything that lives on the game screen.'''
+
+import heapq
+import itertools
+
+
+class World(object):
+
+    '''Keeps registered entities and updates all of them once per tick.
+
+    Entity is any object with ``update(timing)`` method. Returning False
+    from it despawns the entity, just like returning False from Clock
+    callback unschedules it.
+
+    Far entities, the ones ``is_near(entity)`` is false for, are updated
+    once in interval ticks, each in its own tick so the work is spread.
+    '''
+
+    def __init__(self, is_near=None, interval=1):
+        self.is_near = is_near
+        self.interval = interval
+        self.__entities = []
+        self.__spawned = []
+        self.__despawned = set()
+        self.__ticking = False
+        self.ticks = 0
+
+    def __len__(self):
+        return len(self.__entities) + len(self.__spawned)
+
+    def __iter__(self):
+        despawned = self.__despawned
+        for entities in (self.__entities, self.__spawned):
+            for entity in entities:
+                if entity not in despawned:
+                    yield entity
+
+    def __contains__(self, entity):
+        return (entity not in self.__despawned and
+                (entity in self.__entities or entity in self.__spawned))
+
+    def spawn(self, entity):
+        '''Entity is updated starting from the next tick.'''
+        self.__despawned.discard(entity)
+        self.__spawned.append(entity)
+        return entity
+
+    def despawn(self, entity):
+        '''Entity is not updated anymore, even in the current tick.'''
+        self.__despawned.add(entity)
+        if not self.__ticking:
+            self.__flush()
+
+    def __flush(self):
+        if self.__spawned:
+            self.__entities.extend(self.__spawned)
+            del self.__spawned[:]
+
+        if self.__despawned:
+            despawned = self.__despawned
+            self.__entities = [entity for entity in self.__entities
+                               if entity not in despawned]
+            self.__despawned = set()
+
+    def tick(self, timing):
+        self.__flush()
+        self.__ticking = True
+
+        despawned = self.__despawned
+        is_near, interval = self.is_near, self.interval
+        try:
+            for position, entity in enumerate(self.__entities):
+                if entity in despawned:
+                    continue
+                if (interval > 1 and (position + self.ticks) % interval and
+                        not is_near(entity)):
+                    continue
+                if entity.update(timing) is False:
+                    despawned.add(entity)
+        finally:
+            self.__ticking = False
+
+        self.__flush()
+        self.ticks += 1
+
+    def clear(self):
+        del self.__entities[:]
+        del self.__spawned[:]
+        self.__despawned.clear()
+
+
+class Scheduler(object):
+
+    '''Calls back when a growing value, e.g. scrolled distance, reaches
+    the one given for the event. Due events cost the same however many
+    are waiting.'''
+
+    def __init__(self):
+        self.__events = []
+        # Events due at the same value run in the order they were added.
+        self.__order = itertools.count()
+
+    def __len__(self):
+        return len(self.__events)
+
+    def at(self, value, callback, *args):
+        heapq.heappush(self.__events,
+                       (value, next(self.__order), callback, args))
+
+    def advance(self, value):
+        '''Runs every event due at value, including ones added by the
+        callbacks. Returns the number of events run.'''
+        events = self.__events
+        count = 0
+        while events and events[0][0] <= value:
+            _, _, callback, args = heapq.heappop(events)
+            callback(*args)
+            count += 1
+        return count
+
+    def clear(self):
+        del self.__events[:]
+
+
+class FixedTimestep(object):
+
+    '''Turns real frame times into a whole number of fixed steps.'''
+
+    def __init__(self, rate, max_steps=5):
+        self.timing = 1.0 / rate
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+
+    def advance(self, elapsed):
+        '''Number of steps to run now, the rest is left for later.'''
+        self.accumulator += elapsed
+        steps = int(self.accumulator / self.timing)
+        if steps > self.max_steps:
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.timing
+        return steps
+
+    @property
+    def alpha(self):
+        return self.accumulator / self.timing